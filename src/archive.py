@@ -0,0 +1,33 @@
+"""Append-only on-disk trajectory archive.
+
+AgentState only keeps a bounded window of recent scores, feedback, reflections and votes;
+the full per-iteration history is appended here as JSON lines instead, one file per run.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from pydantic_core import to_json
+
+ARCHIVE_DIR = Path(os.getenv("MARS_ARCHIVE_DIR", ".cache/mars/trajectories"))
+
+_archive_lock = threading.Lock()
+
+
+def archive_path(run_id: str) -> str:
+    return str(ARCHIVE_DIR / f"{run_id}.jsonl")
+
+
+def append_record(path: str, kind: str, iteration: int, payload: Any) -> None:
+    """Append one record; pydantic models in the payload are serialized without model_dump()."""
+    if not path:
+        return
+
+    line = to_json({"kind": kind, "iteration": iteration, "payload": payload}, fallback=str)
+    with _archive_lock:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(line + b"\n")
+
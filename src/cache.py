@@ -0,0 +1,36 @@
+"""Content-addressed disk cache for deterministic LLM module calls."""
+
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from diskcache import Cache
+
+CACHE_DIR = Path(os.getenv("MARS_CACHE_DIR", ".cache/mars"))
+DSPY_CACHE_DIR = os.getenv("DSPY_CACHEDIR") or str(CACHE_DIR / "dspy")
+
+
+@lru_cache(maxsize=1)
+def _get_cache() -> Cache:
+    return Cache(str(CACHE_DIR / "modules"))
+
+
+def cache_key(module: str, version: str, *parts: Any) -> str:
+    payload = "|".join([module, version, *(str(p) for p in parts)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cached(key: str) -> Optional[Any]:
+    return _get_cache().get(key)
+
+
+def set_cached(key: str, value: Any) -> None:
+    _get_cache().set(key, value)
+
+
+def signature_version(signature: type) -> str:
+    """Short digest of a signature's fields and instructions, so prompt edits miss the cache."""
+    text = f"{getattr(signature, 'signature', '')}|{getattr(signature, 'instructions', '')}"
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
@@ -1,7 +1,11 @@
+import asyncio
+import contextvars
 import os
 import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import dspy
-from typing import Literal, Union
+from typing import Literal, Optional, Union
 from dotenv import load_dotenv
 
 from langchain_core.messages import AIMessage, HumanMessage
@@ -26,6 +30,7 @@ from src.dspy_agents import (
 )
 from src.self_improvement import (
     ReflectionAgent,
+    ReflectionMemoryStore,
     ConstitutionalCritic,
     SelfHealer,
     ConsensusVoter,
@@ -36,19 +41,38 @@ from src.memory import HierarchicalMemory, DualBufferMemory
 from src.memory.base import BaseMemoryProvider
 from src.optimization import ParetoTracker
 from src.state import MemoryConfig, OptimizationConfig
+from src.cache import DSPY_CACHE_DIR
+from src.archive import archive_path, append_record
 
 load_dotenv()
 
 _memory_providers: dict[str, BaseMemoryProvider] = {}
 _pareto_trackers: dict[str, ParetoTracker] = {}
+_reflection_stores: dict[str, ReflectionMemoryStore] = {}
 _provider_lock = threading.Lock()
 
 _dspy_configured = False
 _dspy_lock = threading.Lock()
 
+# High-volume summarizing modules run on the fast tier; drafting and critique on the strong one.
+FAST_MODEL = "openai/gpt-4o-mini"
+STRONG_MODEL = "openai/gpt-4o"
+_fast_lm: Optional[dspy.LM] = None
+_strong_lm: Optional[dspy.LM] = None
+
+
+def _build_lm(model: str, api_key: str) -> dspy.LM:
+    # Signature instructions are rendered into the system message and never change
+    # between calls, so mark it as a cacheable prefix for providers that need it.
+    return dspy.LM(
+        model=model,
+        api_key=api_key,
+        cache_control_injection_points=[{"location": "message", "role": "system"}],
+    )
+
 
 def _ensure_dspy_configured():
-    global _dspy_configured
+    global _dspy_configured, _fast_lm, _strong_lm
     if _dspy_configured:
         return
 
@@ -58,8 +82,10 @@ def _ensure_dspy_configured():
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
-        lm = dspy.LM(model="openai/gpt-4o", api_key=api_key)
-        dspy.configure(lm=lm)
+        _strong_lm = _build_lm(STRONG_MODEL, api_key)
+        _fast_lm = _build_lm(FAST_MODEL, api_key)
+        dspy.configure(lm=_strong_lm)
+        dspy.configure_cache(disk_cache_dir=DSPY_CACHE_DIR)
         _dspy_configured = True
 
 
@@ -101,7 +127,32 @@ def _build_context_summary(state: AgentState) -> str:
     return "\n".join(parts) if parts else "First iteration - no prior context."
 
 
+def _archive(state: AgentState, kind: str, payload) -> None:
+    try:
+        append_record(
+            state.get("trajectory_archive", ""), kind, state.get("iteration", 1), payload
+        )
+    except OSError as e:
+        print(f"  Trajectory archive failed: {e}")
+
+
+def _run_coroutine(coro):
+    """asyncio.run, moved to a worker thread when this thread already runs an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(contextvars.copy_context().run, asyncio.run, coro).result()
+
+
 def _get_memory_provider(config: MemoryConfig, task_id: str = "default") -> BaseMemoryProvider:
+    # Lock-free fast path for the common case; the lock only guards first creation.
+    provider = _memory_providers.get(task_id)
+    if provider is not None:
+        return provider
+
     with _provider_lock:
         if task_id in _memory_providers:
             return _memory_providers[task_id]
@@ -127,6 +178,10 @@ def _get_memory_provider(config: MemoryConfig, task_id: str = "default") -> Base
 
 
 def _get_pareto_tracker(config: OptimizationConfig, task_id: str = "default") -> ParetoTracker:
+    tracker = _pareto_trackers.get(task_id)
+    if tracker is not None:
+        return tracker
+
     with _provider_lock:
         if task_id in _pareto_trackers:
             return _pareto_trackers[task_id]
@@ -136,6 +191,20 @@ def _get_pareto_tracker(config: OptimizationConfig, task_id: str = "default") ->
         return tracker
 
 
+def _get_reflection_store(task_id: str = "default") -> ReflectionMemoryStore:
+    store = _reflection_stores.get(task_id)
+    if store is not None:
+        return store
+
+    with _provider_lock:
+        if task_id in _reflection_stores:
+            return _reflection_stores[task_id]
+
+        store = ReflectionMemoryStore(lm=_fast_lm)
+        _reflection_stores[task_id] = store
+        return store
+
+
 def entry_node(state: AgentState) -> dict:
     messages = state.get("messages", [])
     task = state.get("task", "")
@@ -167,6 +236,8 @@ def entry_node(state: AgentState) -> dict:
         "meta_state": MetaLearningState(),
         "memory_config": memory_config,
         "optimization_config": optimization_config,
+        # task_id is a per-process hash shared by every run of a task, so each run gets its own file.
+        "trajectory_archive": archive_path(f"run_{uuid.uuid4().hex}"),
         "memory_initialized": True,
     }
 
@@ -323,7 +394,7 @@ def refiner_node(state: AgentState) -> dict:
     if is_boosted:
         print(f"!!! RECURSIVE INTROSPECTION ACTIVATED (RISE pattern) - Iteration {iteration} !!!")
 
-    refiner = SelfRefiner()
+    refiner = SelfRefiner(lm=_strong_lm)
 
     content_to_refine = current_draft if current_draft else contributions
 
@@ -355,7 +426,7 @@ def critique_node(state: AgentState) -> dict:
             ]
         }
 
-    critic = ConstitutionalCritic()
+    critic = ConstitutionalCritic(lm=_strong_lm)
     critique = critic(content=current_draft, principles=principles)
 
     return {"critiques": [critique]}
@@ -407,6 +478,8 @@ def judge_node(state: AgentState) -> dict:
     except Exception as e:
         print(f"  Pareto tracking failed: {e}")
 
+    _archive(state, "judge", {"score": overall_score, "feedback": feedback})
+
     return {
         "scores": [overall_score],
         "feedback_history": [feedback],
@@ -425,17 +498,24 @@ def reflection_node(state: AgentState) -> dict:
     if not scores:
         return {"reflection_memories": []}
 
-    reflector = ReflectionAgent()
+    store = _get_reflection_store(f"task_{hash(task)}")
+    reflector = ReflectionAgent(lm=_fast_lm)
     memory = reflector(
         task=task,
         previous_output=current_draft,
         score=scores[-1],
         feedback=feedback_history[-1] if feedback_history else "No feedback yet",
         past_reflections=reflection_memories,
+        prior_learnings=store.semantic,
     )
 
     print(f"Reflection {iteration}: {memory.improvement_suggestion[:100]}...")
 
+    try:
+        store.add(memory)
+    except Exception as e:
+        print(f"  Reflection consolidation failed: {e}")
+
     try:
         from src.memory.base import TrajectoryData
 
@@ -458,6 +538,8 @@ def reflection_node(state: AgentState) -> dict:
     except Exception as e:
         print(f"  Memory update failed: {e}")
 
+    _archive(state, "reflection", memory)
+
     return {"reflection_memories": [memory]}
 
 
@@ -467,28 +549,25 @@ def consensus_node(state: AgentState) -> dict:
     task = state.get("task", "")
 
     if not current_draft:
-        return {"consensus_votes": []}
+        return {"consensus_votes": [], "latest_consensus": []}
 
     voter_roles = [
         "Technical Accuracy Reviewer - focus on correctness and completeness",
         "Clarity & Structure Expert - focus on readability and organization",
         "Practical Utility Assessor - focus on actionability and usefulness",
     ]
-    voter = ConsensusVoter()
-
-    votes = []
-    for role in voter_roles:
-        try:
-            vote = voter(content=current_draft, task=task, voter_role=role)
-            votes.append(vote)
-        except Exception as e:
-            print(f"Consensus voter error ({role}): {e}")
+    voter = ConsensusVoter(lm=_fast_lm, voter_roles=voter_roles)
+    votes = _run_coroutine(
+        voter.stream_votes(content=current_draft, task=task, voter_roles=voter_roles)
+    )
 
     if votes:
         avg_score = sum(v.score for v in votes) / len(votes)
         print(f"Consensus: {avg_score:.1f}/10 from {len(votes)} voters")
 
-    return {"consensus_votes": votes}
+    _archive(state, "consensus", votes)
+
+    return {"consensus_votes": votes, "latest_consensus": votes}
 
 
 def meta_learning_node(state: AgentState) -> dict:
@@ -500,7 +579,7 @@ def meta_learning_node(state: AgentState) -> dict:
     if len(scores) < 1:
         return {"meta_state": meta_state}
 
-    learner = MetaLearner()
+    learner = MetaLearner(lm=_fast_lm)
     new_meta_state = learner(
         scores=scores,
         successful_patterns=meta_state.successful_patterns,
@@ -525,7 +604,7 @@ def self_healing_node(state: AgentState) -> dict:
     if not failed_agents:
         return {"recovery_mode": False, "global_health": "healthy"}
 
-    healer = SelfHealer()
+    healer = SelfHealer(lm=_fast_lm)
     updated_health = agent_health.copy()
 
     for agent_name in failed_agents:
@@ -631,7 +710,7 @@ def route_after_evolution(state: AgentState) -> Literal["loop_decision", "diagra
     max_iterations = state.get("max_iterations", 7)
     scores = state.get("scores", [])
     critiques = state.get("critiques", [])
-    consensus_votes = state.get("consensus_votes", [])
+    latest_consensus = state.get("latest_consensus", [])
 
     if scores and scores[-1] >= 8.5:
         print(f"Target score reached: {scores[-1]:.1f}/10")
@@ -646,9 +725,8 @@ def route_after_evolution(state: AgentState) -> Literal["loop_decision", "diagra
         print("!!! CONSTITUTIONAL VIOLATION - Forcing another iteration !!!")
         return "loop_decision"
 
-    if consensus_votes:
-        recent = consensus_votes[-3:]
-        avg = sum(v.score for v in recent) / len(recent) if recent else 0
+    if latest_consensus:
+        avg = sum(v.score for v in latest_consensus) / len(latest_consensus)
         if avg >= 8.5:
             print(f"Consensus threshold reached: {avg:.1f}/10")
             return "diagram"
@@ -1,12 +1,15 @@
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import groupby
 from typing import Optional
 import random
 import math
 import uuid
 
+import numpy as np
 
-@dataclass
+
+@dataclass(slots=True)
 class MemoryNode:
     node_id: str
     content: str
@@ -21,15 +24,50 @@ class MemoryNode:
     created_at: datetime = field(default_factory=datetime.now)
     score: float = 0.0
 
+    # Minimum utility/visits over this node and its descendants, kept current by
+    # MemoryTree.add_version and update_utility for the node and all its ancestors.
+    subtree_min_utility: float = 0.0
+    subtree_min_visits: int = 0
+
+    # Highest-utility child (first on ties), kept current by add_child and the children's
+    # update_utility so get_best_path never scans siblings.
+    parent: Optional["MemoryNode"] = field(default=None, repr=False, compare=False)
+    best_child: Optional["MemoryNode"] = field(default=None, repr=False, compare=False)
+
     def add_child(self, child: "MemoryNode") -> None:
         child.parent_id = self.node_id
+        child.parent = self
         self.children.append(child)
+        self._refresh_best_child()
 
     def update_utility(self, utility: float) -> None:
+        self._record_utility(utility)
+        self._refresh_subtree_stats()
+
+    def _record_utility(self, utility: float) -> None:
         self.utility_samples.append(utility)
         self.visit_count += 1
-        self.mean_utility = sum(self.utility_samples) / len(self.utility_samples)
+        self.mean_utility += (utility - self.mean_utility) / self.visit_count
         self.score = self.mean_utility
+        if self.parent is not None:
+            self.parent._refresh_best_child()
+
+    def _refresh_best_child(self) -> None:
+        self.best_child = max(self.children, key=lambda n: n.mean_utility)
+
+    def _update_subtree_stats(self) -> None:
+        self.subtree_min_utility = min(
+            [self.mean_utility] + [c.subtree_min_utility for c in self.children]
+        )
+        self.subtree_min_visits = min(
+            [self.visit_count] + [c.subtree_min_visits for c in self.children]
+        )
+
+    def _refresh_subtree_stats(self) -> None:
+        node: Optional[MemoryNode] = self
+        while node:
+            node._update_subtree_stats()
+            node = node.parent
 
     def get_ucb_score(self, total_visits: int, c: float = 1.414) -> float:
         if self.visit_count == 0:
@@ -58,6 +96,7 @@ class MemoryTree:
         )
         self._nodes["root"] = self.root
         self._total_visits = 0
+        self._rng = np.random.default_rng()
 
     def add_version(
         self,
@@ -79,6 +118,7 @@ class MemoryTree:
 
         parent.add_child(new_node)
         self._nodes[node_id] = new_node
+        parent._refresh_subtree_stats()
         return new_node
 
     def get_node(self, node_id: str) -> Optional[MemoryNode]:
@@ -86,26 +126,34 @@ class MemoryTree:
 
     def get_best_path(self) -> list[MemoryNode]:
         path = [self.root]
-        current = self.root
+        current = self.root.best_child
 
-        while current.children:
-            best_child = max(current.children, key=lambda n: n.mean_utility)
-            path.append(best_child)
-            current = best_child
+        while current is not None:
+            path.append(current)
+            current = current.best_child
 
         return path
 
     def select_node_thompson(self) -> MemoryNode:
+        return self.select_nodes_thompson(1)[0]
+
+    def select_nodes_thompson(self, k: int) -> list[MemoryNode]:
+        """k independent Thompson selections; all candidates are sampled in one batched draw."""
         candidates: list[MemoryNode] = []
         self._collect_candidates(self.root, candidates)
 
         if not candidates:
-            return self.root
+            return [self.root] * k
 
-        samples = [(node, node.sample_thompson()) for node in candidates]
+        n = len(candidates)
+        mean = np.fromiter((c.mean_utility for c in candidates), dtype=float, count=n)
+        visits = np.fromiter((c.visit_count for c in candidates), dtype=int, count=n)
 
-        best_node, _ = max(samples, key=lambda x: x[1])
-        return best_node
+        # Same distribution as MemoryNode.sample_thompson: uniform until a node has two visits.
+        beta_draws = self._rng.beta(np.maximum(1, mean), np.maximum(1, 10 - mean), size=(k, n))
+        samples = np.where(visits < 2, self._rng.random((k, n)), beta_draws) * 10
+
+        return [candidates[i] for i in samples.argmax(axis=1)]
 
     def _collect_candidates(
         self,
@@ -117,6 +165,9 @@ class MemoryTree:
         if depth >= max_depth:
             return
 
+        if node.subtree_min_visits >= 5 and node.subtree_min_utility >= 9.0:
+            return
+
         if node.visit_count < 5 or node.mean_utility < 9.0:
             candidates.append(node)
 
@@ -127,37 +178,28 @@ class MemoryTree:
         current = self._nodes.get(leaf_node_id)
         self._total_visits += 1
 
+        # One bottom-up pass: each node's stats are refreshed after its child on the path.
         while current:
-            current.update_utility(utility)
-            if current.parent_id:
-                current = self._nodes.get(current.parent_id)
-            else:
-                break
+            current._record_utility(utility)
+            current._update_subtree_stats()
+            current = current.parent
 
     def get_pareto_front(self) -> list[MemoryNode]:
-        all_nodes = list(self._nodes.values())
-        pareto_front = []
-
-        for node in all_nodes:
-            is_dominated = False
-            for other in all_nodes:
-                if other.node_id == node.node_id:
-                    continue
-                if (
-                    other.mean_utility >= node.mean_utility
-                    and other.visit_count <= node.visit_count
-                    and (
-                        other.mean_utility > node.mean_utility
-                        or other.visit_count < node.visit_count
-                    )
-                ):
-                    is_dominated = True
-                    break
-
-            if not is_dominated:
-                pareto_front.append(node)
-
-        return pareto_front
+        # Two objectives (maximize mean_utility, minimize visit_count), so a sort
+        # followed by a single sweep replaces the pairwise dominance check.
+        ranked = sorted(self._nodes.values(), key=lambda n: (-n.mean_utility, n.visit_count))
+        front_ids: set[str] = set()
+        min_visits_above = math.inf
+
+        for _, group in groupby(ranked, key=lambda n: n.mean_utility):
+            group = list(group)
+            group_min_visits = group[0].visit_count
+            for node in group:
+                if node.visit_count < min_visits_above and node.visit_count == group_min_visits:
+                    front_ids.add(node.node_id)
+            min_visits_above = min(min_visits_above, group_min_visits)
+
+        return [node for node in self._nodes.values() if node.node_id in front_ids]
 
     def get_stats(self) -> dict:
         return {
@@ -4,37 +4,71 @@ from typing import Any, Optional
 import random
 import uuid
 
+import numpy as np
+from pydantic_core import to_json
 
-@dataclass
+# Front recomputation switches to bit-packed, row-blocked dominance masks at this size.
+PACKED_FRONT_MIN = 128
+# Incremental front updates use the scalar comparator below this front size.
+SCALAR_FRONT_MAX = 32
+
+
+@dataclass(slots=True)
 class Candidate:
     candidate_id: str
     content: dict[str, Any]
+    # Read-only once constructed: mutations share the parent's scores mapping.
     scores: dict[str, float]
 
     generation: int = 0
     parent_id: Optional[str] = None
     mutation_description: str = ""
     created_at: datetime = field(default_factory=datetime.now)
+    _overall: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._overall = sum(self.scores.values()) / len(self.scores) if self.scores else 0.0
 
     @property
     def overall_score(self) -> float:
-        if not self.scores:
-            return 0.0
-        return sum(self.scores.values()) / len(self.scores)
+        return self._overall
 
     def dominates(self, other: "Candidate") -> bool:
-        dominated_in_all = True
-        strictly_better_in_one = False
+        better = False
+        other_scores = other.scores
 
         for obj, score in self.scores.items():
-            other_score = other.scores.get(obj, 0)
-            if score < other_score:
-                dominated_in_all = False
-                break
-            if score > other_score:
-                strictly_better_in_one = True
-
-        return dominated_in_all and strictly_better_in_one
+            diff = score - other_scores.get(obj, 0.0)
+            if diff < 0:
+                return False
+            better |= diff > 0
+
+        return better
+
+
+def _dominates_scalar(a: tuple[float, ...], b: tuple[float, ...]) -> int:
+    """1 if a dominates b, -1 if b dominates a, 0 if neither does."""
+    ge = le = True
+    for x, y in zip(a, b):
+        if x < y:
+            ge = False
+            if not le:
+                return 0
+        elif x > y:
+            le = False
+            if not ge:
+                return 0
+    if ge == le:
+        return 0
+    return 1 if ge else -1
+
+
+def _dominance(rows: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """[i, j] is True when rows[i] is at least as good as scores[j] everywhere and strictly
+    better somewhere."""
+    ge = (rows[:, None, :] >= scores[None, :, :]).all(axis=-1)
+    gt = (rows[:, None, :] > scores[None, :, :]).any(axis=-1)
+    return ge & gt
 
 
 @dataclass
@@ -51,6 +85,14 @@ class ParetoTracker:
         self.objectives = objectives
         self.candidates: list[Candidate] = []
         self._generation = 0
+        # Row i holds candidates[i]'s scores in objective order; capacity grows by doubling.
+        self._scores = np.empty((8, len(objectives)))
+        # overall_score of candidates[i], same capacity as _scores.
+        self._overall = np.empty(8)
+        # Indices of non-dominated candidates, in insertion order.
+        self._front_idx: list[int] = []
+        # Last get_state() snapshot; reset to None whenever candidates, front or generation change.
+        self._cached_state: Optional[dict] = None
 
     def add_candidate(
         self,
@@ -67,27 +109,67 @@ class ParetoTracker:
             parent_id=parent_id,
             mutation_description=mutation_description,
         )
+        n = len(self.candidates)
+        if n == len(self._scores):
+            self._scores = np.resize(self._scores, (max(2 * n, 8), len(self.objectives)))
+            self._overall = np.resize(self._overall, max(2 * n, 8))
+        self._scores[n] = [candidate.scores[obj] for obj in self.objectives]
+        self._overall[n] = candidate.overall_score
+
         self.candidates.append(candidate)
+        self._update_front(n)
+        self._cached_state = None
         return candidate
 
-    def get_pareto_front(self) -> list[Candidate]:
-        if not self.candidates:
-            return []
-
-        front = []
-        for candidate in self.candidates:
-            is_dominated = False
-            for other in self.candidates:
-                if other.candidate_id == candidate.candidate_id:
-                    continue
-                if other.dominates(candidate):
-                    is_dominated = True
-                    break
-
-            if not is_dominated:
-                front.append(candidate)
+    def _update_front(self, i: int) -> None:
+        # Anything dominated by a non-front candidate is also dominated by a front member,
+        # so the new point only needs comparing against the current front.
+        if len(self._front_idx) < SCALAR_FRONT_MAX:
+            self._update_front_scalar(i)
+            return
+
+        row = self._scores[i]
+        front = self._scores[self._front_idx]
+
+        if ((front >= row).all(axis=1) & (front > row).any(axis=1)).any():
+            return
+
+        beaten = (row >= front).all(axis=1) & (row > front).any(axis=1)
+        self._front_idx = [j for j, b in zip(self._front_idx, beaten) if not b]
+        self._front_idx.append(i)
+
+    def _update_front_scalar(self, i: int) -> None:
+        # Small fronts: a plain early-exit loop is cheaper than NumPy's per-call setup.
+        row = tuple(self.candidates[i].scores.values())
+        kept = []
+        for j in self._front_idx:
+            cmp = _dominates_scalar(row, tuple(self.candidates[j].scores.values()))
+            if cmp < 0:
+                return
+            if cmp == 0:
+                kept.append(j)
+        kept.append(i)
+        self._front_idx = kept
+
+    def _compute_front_idx(self) -> list[int]:
+        scores = self._scores[: len(self.candidates)]
+        n = len(scores)
+        if n < PACKED_FRONT_MIN:
+            dominated = _dominance(scores, scores).any(axis=0)
+            return np.flatnonzero(~dominated).tolist()
+
+        # Build the dominance matrix a block of rows at a time and OR each block's bit-packed
+        # rows into one mask, so the full n x n x d comparison is never materialized.
+        packed = np.zeros((n + 7) // 8, dtype=np.uint8)
+        for start in range(0, n, PACKED_FRONT_MIN):
+            block = _dominance(scores[start : start + PACKED_FRONT_MIN], scores)
+            packed |= np.bitwise_or.reduce(np.packbits(block, axis=1), axis=0)
+        dominated = np.unpackbits(packed, count=n).astype(bool)
+
+        return np.flatnonzero(~dominated).tolist()
 
-        return front
+    def get_pareto_front(self) -> list[Candidate]:
+        return [self.candidates[i] for i in self._front_idx]
 
     def select_pareto(self) -> Optional[Candidate]:
         front = self.get_pareto_front()
@@ -105,10 +187,11 @@ class ParetoTracker:
     def select_best_overall(self) -> Optional[Candidate]:
         if not self.candidates:
             return None
-        return max(self.candidates, key=lambda c: c.overall_score)
+        return self.candidates[int(self._overall[: len(self.candidates)].argmax())]
 
     def advance_generation(self) -> None:
         self._generation += 1
+        self._cached_state = None
 
     def get_dominated_candidates(self) -> list[Candidate]:
         front_ids = {c.candidate_id for c in self.get_pareto_front()}
@@ -124,15 +207,23 @@ class ParetoTracker:
         to_keep_ids = front_ids | {c.candidate_id for c in dominated[:keep_n]}
 
         original_count = len(self.candidates)
-        self.candidates = [c for c in self.candidates if c.candidate_id in to_keep_ids]
+        kept = [i for i, c in enumerate(self.candidates) if c.candidate_id in to_keep_ids]
+        self.candidates = [self.candidates[i] for i in kept]
+        self._scores = self._scores[kept]
+        self._overall = self._overall[kept]
+        self._front_idx = self._compute_front_idx()
+        self._cached_state = None
 
         return original_count - len(self.candidates)
 
     def get_state(self) -> dict:
+        if self._cached_state is not None:
+            return self._cached_state
+
         front = self.get_pareto_front()
         best = self.select_best_overall()
 
-        return {
+        self._cached_state = {
             "candidates": [
                 {
                     "id": c.candidate_id,
@@ -149,3 +240,7 @@ class ParetoTracker:
             "total_candidates": len(self.candidates),
             "front_size": len(front),
         }
+        return self._cached_state
+
+    def serialize_state(self) -> bytes:
+        return to_json(self.get_state())
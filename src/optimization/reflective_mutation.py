@@ -1,13 +1,20 @@
 import dspy
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, Any
+import hashlib
+import json
+import sys
 import uuid
 
 from src.optimization.pareto import Candidate
 
+ANALYSIS_CACHE_SIZE = 1024
+MERGE_CACHE_SIZE = 512
 
-@dataclass
+
+@dataclass(slots=True)
 class FailureTrace:
     task: str
     candidate_content: dict[str, Any]
@@ -18,8 +25,12 @@ class FailureTrace:
     error_details: Optional[str] = None
     timestamp: datetime = field(default_factory=datetime.now)
 
+    def __post_init__(self) -> None:
+        # Objective names come from a small fixed set; share one string object per name.
+        self.objectives_failed = [sys.intern(o) for o in self.objectives_failed]
+
 
-@dataclass
+@dataclass(slots=True)
 class MutationProposal:
     original_content: dict[str, Any]
     proposed_content: dict[str, Any]
@@ -29,6 +40,36 @@ class MutationProposal:
     confidence: float = 0.5
 
 
+def _derive(content: dict[str, Any], **overrides: Any) -> dict[str, Any]:
+    out = dict(content)
+    out.update(overrides)
+    return out
+
+
+def _trace_fingerprint(trace: FailureTrace) -> str:
+    # Only the first line of error details is keyed so that tracebacks differing in
+    # addresses or timestamps still share one analysis.
+    error_bucket = trace.error_details.splitlines()[0][:200] if trace.error_details else ""
+    payload = json.dumps(
+        [
+            trace.task,
+            trace.candidate_content,
+            trace.expected_outcome,
+            trace.actual_outcome,
+            sorted(trace.objectives_failed),
+            error_bucket,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _content_hash(content: dict[str, Any]) -> str:
+    payload = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
 class ReflectiveAnalysisSignature(dspy.Signature):
     task: str = dspy.InputField(desc="The task that was attempted")
     candidate_content: str = dspy.InputField(desc="The candidate (prompt/config) that failed")
@@ -54,71 +95,146 @@ class ReflectiveMutator:
     def __init__(self):
         self._analyzer = dspy.ChainOfThought(ReflectiveAnalysisSignature)
         self._merger = dspy.ChainOfThought(MergeSignature)
+        self._analysis_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._merge_cache: OrderedDict[tuple[str, ...], dict[str, str]] = OrderedDict()
 
     def analyze_and_propose(self, trace: FailureTrace) -> Optional[MutationProposal]:
+        key = _trace_fingerprint(trace)
         try:
-            result = self._analyzer(
-                task=trace.task,
-                candidate_content=str(trace.candidate_content),
-                expected_outcome=trace.expected_outcome,
-                actual_outcome=trace.actual_outcome,
-                failed_objectives=", ".join(trace.objectives_failed),
-            )
+            analysis = self._get_cached_analysis(key)
+            if analysis is None:
+                result = self._analyzer(**self._analyzer_inputs(trace))
+                analysis = self._store_analysis(key, result)
+            return self._build_proposal(trace, analysis)
+        except Exception as e:
+            return self._fallback_proposal(trace, e)
 
-            proposed = trace.candidate_content.copy()
-            if "prompt" in proposed:
-                proposed["prompt"] = f"{proposed['prompt']}\n\nImprovement: {result.improvement}"
+    def analyze_and_propose_batch(
+        self, traces: list[FailureTrace]
+    ) -> list[Optional[MutationProposal]]:
+        keys = [_trace_fingerprint(trace) for trace in traces]
+        analyses = [self._get_cached_analysis(key) for key in keys]
+        pending = [i for i, analysis in enumerate(analyses) if analysis is None]
+        errors: dict[int, Exception] = {}
+
+        if pending:
+            examples = []
+            for i in pending:
+                inputs = self._analyzer_inputs(traces[i])
+                examples.append(dspy.Example(**inputs).with_inputs(*inputs))
+
+            try:
+                results = self._analyzer.batch(
+                    examples,
+                    num_threads=min(8, len(examples)),
+                    max_errors=len(examples),
+                    disable_progress_bar=True,
+                )
+            except Exception as e:
+                results = [e] * len(pending)
+
+            for i, result in zip(pending, results):
+                if result is None:
+                    errors[i] = RuntimeError("batched analysis returned no result")
+                elif isinstance(result, Exception):
+                    errors[i] = result
+                else:
+                    try:
+                        analyses[i] = self._store_analysis(keys[i], result)
+                    except Exception as e:
+                        errors[i] = e
+
+        proposals = []
+        for i, (trace, analysis) in enumerate(zip(traces, analyses)):
+            if analysis is None:
+                proposals.append(self._fallback_proposal(trace, errors[i]))
             else:
-                proposed["_improvement"] = result.improvement
-
-            confidence = result.confidence
-            if isinstance(confidence, str):
-                try:
-                    confidence = float(confidence)
-                except ValueError:
-                    confidence = 0.5
-
-            return MutationProposal(
-                original_content=trace.candidate_content,
-                proposed_content=proposed,
-                rationale=f"{result.analysis}\n\nRoot cause: {result.root_cause}",
-                target_objectives=trace.objectives_failed,
-                expected_improvement=1.0,
-                confidence=min(1.0, max(0.0, confidence)),
-            )
+                proposals.append(self._build_proposal(trace, analysis))
 
-        except Exception as e:
-            proposed = trace.candidate_content.copy()
-            proposed["_mutation"] = f"auto_fix_{datetime.now().timestamp()}"
-            return MutationProposal(
-                original_content=trace.candidate_content,
-                proposed_content=proposed,
-                rationale=f"Auto-mutation due to analysis failure: {str(e)}",
-                target_objectives=trace.objectives_failed,
-                expected_improvement=0.5,
-                confidence=0.2,
+        return proposals
+
+    def _get_cached_analysis(self, key: str) -> Optional[dict[str, Any]]:
+        analysis = self._analysis_cache.get(key)
+        if analysis is not None:
+            self._analysis_cache.move_to_end(key)
+        return analysis
+
+    def _store_analysis(self, key: str, result: Any) -> dict[str, Any]:
+        confidence = result.confidence
+        if isinstance(confidence, str):
+            try:
+                confidence = float(confidence)
+            except ValueError:
+                confidence = 0.5
+
+        analysis = {
+            "analysis": result.analysis,
+            "root_cause": result.root_cause,
+            "improvement": result.improvement,
+            "confidence": min(1.0, max(0.0, confidence)),
+        }
+        self._analysis_cache[key] = analysis
+        if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+        return analysis
+
+    def _analyzer_inputs(self, trace: FailureTrace) -> dict[str, str]:
+        return {
+            "task": trace.task,
+            "candidate_content": str(trace.candidate_content),
+            "expected_outcome": trace.expected_outcome,
+            "actual_outcome": trace.actual_outcome,
+            "failed_objectives": ", ".join(trace.objectives_failed),
+        }
+
+    def _build_proposal(self, trace: FailureTrace, analysis: dict[str, Any]) -> MutationProposal:
+        content = trace.candidate_content
+        if "prompt" in content:
+            proposed = _derive(
+                content, prompt=f"{content['prompt']}\n\nImprovement: {analysis['improvement']}"
             )
+        else:
+            proposed = _derive(content, _improvement=analysis["improvement"])
+
+        return MutationProposal(
+            original_content=trace.candidate_content,
+            proposed_content=proposed,
+            rationale=f"{analysis['analysis']}\n\nRoot cause: {analysis['root_cause']}",
+            target_objectives=trace.objectives_failed,
+            expected_improvement=1.0,
+            confidence=analysis["confidence"],
+        )
+
+    def _fallback_proposal(self, trace: FailureTrace, error: Exception) -> MutationProposal:
+        proposed = _derive(
+            trace.candidate_content, _mutation=f"auto_fix_{datetime.now().timestamp()}"
+        )
+        return MutationProposal(
+            original_content=trace.candidate_content,
+            proposed_content=proposed,
+            rationale=f"Auto-mutation due to analysis failure: {str(error)}",
+            target_objectives=trace.objectives_failed,
+            expected_improvement=0.5,
+            confidence=0.2,
+        )
 
     def merge_candidates(self, candidates: list[Candidate]) -> Optional[Candidate]:
         if len(candidates) < 2:
             return None
 
         try:
-            candidates_str = "\n".join(
-                [
-                    f"Candidate {i + 1}: {c.content} | Scores: {c.scores}"
-                    for i, c in enumerate(candidates)
-                ]
-            )
-
-            objectives_str = ", ".join(candidates[0].scores.keys())
-
-            result = self._merger(
-                candidates=candidates_str,
-                objectives=objectives_str,
-            )
+            # Keyed on content rather than ids, so re-discovered candidates reuse the merge.
+            key = tuple(sorted(_content_hash(c.content) for c in candidates))
+            merge = self._merge_cache.get(key)
+            if merge is None:
+                merge = self._run_merge(candidates)
+                self._merge_cache[key] = merge
+                if len(self._merge_cache) > MERGE_CACHE_SIZE:
+                    self._merge_cache.popitem(last=False)
+            else:
+                self._merge_cache.move_to_end(key)
 
-            merged_content = {"merged": result.merged_content}
+            merged_content = {"merged": merge["merged_content"]}
 
             avg_scores = {}
             for obj in candidates[0].scores.keys():
@@ -130,26 +246,51 @@ class ReflectiveMutator:
                 scores=avg_scores,
                 generation=max(c.generation for c in candidates) + 1,
                 parent_id=candidates[0].candidate_id,
-                mutation_description=f"Merged from {len(candidates)} candidates: {result.rationale}",
+                mutation_description=(
+                    f"Merged from {len(candidates)} candidates: {merge['rationale']}"
+                ),
             )
 
         except Exception:
             return None
 
+    def _run_merge(self, candidates: list[Candidate]) -> dict[str, str]:
+        candidates_str = "\n".join(
+            [
+                f"Candidate {i + 1}: {c.content} | Scores: {c.scores}"
+                for i, c in enumerate(candidates)
+            ]
+        )
+        objectives_str = ", ".join(candidates[0].scores.keys())
+
+        result = self._merger(
+            candidates=candidates_str,
+            objectives=objectives_str,
+        )
+        return {"merged_content": result.merged_content, "rationale": result.rationale}
+
     def create_mutation(
         self,
         candidate: Candidate,
         trace: FailureTrace,
     ) -> Candidate:
         proposal = self.analyze_and_propose(trace)
+        return self._mutate(candidate, proposal)
+
+    def create_mutations(
+        self,
+        candidate: Candidate,
+        traces: list[FailureTrace],
+    ) -> list[Candidate]:
+        proposals = self.analyze_and_propose_batch(traces)
+        return [self._mutate(candidate, proposal) for proposal in proposals]
 
+    def _mutate(self, candidate: Candidate, proposal: Optional[MutationProposal]) -> Candidate:
         if proposal is None:
-            new_content = candidate.content.copy()
-            new_content["_mutated"] = True
             return Candidate(
                 candidate_id=f"mut_{uuid.uuid4().hex[:8]}",
-                content=new_content,
-                scores=candidate.scores.copy(),
+                content=_derive(candidate.content, _mutated=True),
+                scores=candidate.scores,
                 generation=candidate.generation + 1,
                 parent_id=candidate.candidate_id,
                 mutation_description="Random mutation (analysis failed)",
@@ -158,7 +299,7 @@ class ReflectiveMutator:
         return Candidate(
             candidate_id=f"mut_{uuid.uuid4().hex[:8]}",
             content=proposal.proposed_content,
-            scores=candidate.scores.copy(),
+            scores=candidate.scores,
             generation=candidate.generation + 1,
             parent_id=candidate.candidate_id,
             mutation_description=proposal.rationale[:200],
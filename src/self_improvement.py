@@ -1,15 +1,42 @@
+import asyncio
+import json
+import math
 import dspy
-from typing import Optional
+from collections import deque
+from collections.abc import AsyncIterator, Sequence
+from contextlib import nullcontext
+from functools import lru_cache
+from dspy.streaming import StreamListener, StreamResponse
+from itertools import islice
+from typing import Optional, Union
+from src.cache import cache_key, get_cached, set_cached, signature_version
+from src.tokens import clip
 from src.state import (
     ReflectionMemory,
     CritiqueResult,
     HealthStatus,
     ConsensusVote,
     MetaLearningState,
+    StrategyWeights,
     CONSTITUTIONAL_PRINCIPLES,
 )
 
 
+def _lm_scope(lm: Optional[dspy.LM]):
+    return dspy.context(lm=lm) if lm is not None else nullcontext()
+
+
+def _model_name(lm: Optional[dspy.LM]) -> str:
+    return getattr(lm or dspy.settings.lm, "model", "")
+
+
+def _format_reflection(r: ReflectionMemory) -> str:
+    return (
+        f"Iteration {r.iteration} (score={r.score:.1f}): {r.reflection}"
+        f" -> Action: {r.improvement_suggestion}"
+    )
+
+
 class ReflectionSignature(dspy.Signature):
     """You are implementing the Reflexion pattern (Shinn et al. 2023). Analyze the previous attempt's trajectory to extract actionable learnings. Focus on: (1) what specific aspects led to the current score, (2) what patterns from past iterations should be reinforced or avoided, (3) concrete next steps. Your reflection will be stored in episodic memory and used to guide future iterations."""
 
@@ -38,12 +65,13 @@ class ReflectionSignature(dspy.Signature):
 class ConstitutionalCritiqueSignature(dspy.Signature):
     """You are a Constitutional AI critic (Anthropic 2022). Your role is to evaluate content against a set of inviolable principles. Unlike general feedback, you focus ONLY on principle violations. Be strict but fair - only flag genuine violations, not stylistic preferences. Your critique directly influences whether content can proceed or must be revised."""
 
-    content: str = dspy.InputField(desc="The content to evaluate against constitutional principles")
     principles: str = dspy.InputField(desc="The constitutional principles - each must be checked")
+    content: str = dspy.InputField(desc="The content to evaluate against constitutional principles")
 
     violated_principle: str = dspy.OutputField(
         desc="Which specific principle was violated, or 'none' if all principles are satisfied"
     )
+    # Plain str: DSPy parses Literal outputs case-sensitively, so CritiqueResult normalizes it.
     severity: str = dspy.OutputField(
         desc="Severity level: 'none' (no violation), 'minor' (small issue), 'major' (significant problem), 'critical' (must fix before proceeding)"
     )
@@ -84,8 +112,8 @@ class SelfHealingSignature(dspy.Signature):
 class ConsensusSignature(dspy.Signature):
     """You are a specialized reviewer in a multi-agent debate system. Evaluate the content from your specific role's perspective. Your vote will be combined with other reviewers to reach consensus. Be critical but constructive - identify both strengths and areas for improvement."""
 
-    content: str = dspy.InputField(desc="The content to evaluate")
     task: str = dspy.InputField(desc="The original task/goal")
+    content: str = dspy.InputField(desc="The content to evaluate")
     voter_role: str = dspy.InputField(
         desc="Your review perspective (e.g., 'Technical Reviewer', 'UX Expert', 'QA')"
     )
@@ -94,8 +122,8 @@ class ConsensusSignature(dspy.Signature):
     rationale: str = dspy.OutputField(
         desc="Detailed reasoning for your score - what aspects influenced it?"
     )
-    improvements: str = dspy.OutputField(
-        desc="Comma-separated list of specific improvements from your perspective"
+    improvements: list[str] = dspy.OutputField(
+        desc="Specific improvements from your perspective"
     )
     confidence: float = dspy.OutputField(
         desc="Your confidence in this assessment 0-1 (1 = certain, 0 = guessing)"
@@ -117,8 +145,8 @@ class MetaLearningSignature(dspy.Signature):
     strategy_adjustment: str = dspy.OutputField(
         desc="What strategic change to make based on the patterns observed"
     )
-    new_weights: str = dspy.OutputField(
-        desc="Updated weights as 'key:value,key:value' format. Keys: depth_vs_breadth, creativity_vs_precision, exploration_vs_exploitation. Values: 0.0-1.0"
+    new_weights: StrategyWeights = dspy.OutputField(
+        desc="Updated strategy weights, each between 0.0 and 1.0"
     )
     reasoning: str = dspy.OutputField(
         desc="Why this adjustment is recommended based on the performance patterns"
@@ -129,14 +157,14 @@ class SelfRefineSignature(dspy.Signature):
     """You are implementing SELF-REFINE (Madaan et al. 2023). Given content, critique, and reflection insights, produce an improved version. Key principles: (1) address ALL points in the critique, (2) incorporate insights from reflection memory, (3) maintain what's working well, (4) be more aggressive with changes when intensity is 'High' or 'Critical'."""
 
     task: str = dspy.InputField(desc="The original task/goal")
-    current_content: str = dspy.InputField(desc="The current version of the content to refine")
-    self_critique: str = dspy.InputField(desc="Feedback and critique to address")
-    reflection_insights: str = dspy.InputField(
-        desc="Insights from reflection memory - learnings from previous iterations"
-    )
     intensity: str = dspy.InputField(
         desc="Refinement intensity: 'Standard' (incremental), 'High' (significant changes), 'Critical' (major overhaul)"
     )
+    reflection_insights: str = dspy.InputField(
+        desc="Insights from reflection memory - learnings from previous iterations"
+    )
+    current_content: str = dspy.InputField(desc="The current version of the content to refine")
+    self_critique: str = dspy.InputField(desc="Feedback and critique to address")
 
     refined_content: str = dspy.OutputField(
         desc="The improved content - must address all critique points and incorporate reflection insights"
@@ -147,10 +175,40 @@ class SelfRefineSignature(dspy.Signature):
     )
 
 
+_REFLECTION_VERSION = signature_version(ReflectionSignature)
+_CRITIC_VERSION = signature_version(ConstitutionalCritiqueSignature)
+
+
+def _format_principles(principles: list[str]) -> str:
+    return "\n".join(f"{i + 1}. {p}" for i, p in enumerate(principles))
+
+
+_DEFAULT_PRINCIPLES_TEXT = _format_principles(CONSTITUTIONAL_PRINCIPLES)
+
+# Predictors are shared by every module instance: nodes build a fresh module per call, and
+# predictors hold no per-call state (the LM comes from dspy.context via _lm_scope).
+_REFLECTOR = dspy.ChainOfThought(ReflectionSignature)
+_CONSOLIDATOR = dspy.Predict("episodes -> semantic_insight")
+_CRITIC = dspy.ChainOfThought(ConstitutionalCritiqueSignature)
+_HEALER = dspy.Predict(SelfHealingSignature)
+_LEARNER = dspy.ChainOfThought(MetaLearningSignature)
+_REFINER = dspy.ChainOfThought(SelfRefineSignature)
+
+
+@lru_cache(maxsize=None)
+def _role_voter(voter_role: str) -> dspy.Predict:
+    """Predictor with the role baked into its instructions, so each role can be optimized alone."""
+    signature = ConsensusSignature.delete("voter_role").with_instructions(
+        f"{ConsensusSignature.instructions}\n\nYour review perspective: {voter_role}"
+    )
+    return dspy.Predict(signature)
+
+
 class ReflectionAgent(dspy.Module):
-    def __init__(self):
+    def __init__(self, lm: Optional[dspy.LM] = None):
         super().__init__()
-        self.reflector = dspy.ChainOfThought(ReflectionSignature)
+        self.lm = lm
+        self.reflector = _REFLECTOR
 
     def forward(
         self,
@@ -158,79 +216,138 @@ class ReflectionAgent(dspy.Module):
         previous_output: str,
         score: float,
         feedback: str,
-        past_reflections: list[ReflectionMemory],
+        past_reflections: Sequence[ReflectionMemory],
+        prior_learnings: str = "",
     ) -> ReflectionMemory:
+        if isinstance(past_reflections, deque):
+            # Deques don't slice; read the last three from the right end instead of walking it.
+            recent = list(islice(reversed(past_reflections), 3))[::-1]
+        else:
+            recent = past_reflections[-3:]
         past_summary = (
-            "\n".join(
-                [
-                    f"Iteration {r.iteration} (score={r.score:.1f}): {r.reflection} -> Action: {r.improvement_suggestion}"
-                    for r in past_reflections[-3:]
-                ]
-            )
+            "\n".join(_format_reflection(r) for r in recent)
             if past_reflections
             else "This is the first iteration - no prior reflections available."
         )
-
-        result = self.reflector(
-            task=task,
-            previous_output=previous_output[:3000],
-            score=score,
-            feedback=feedback,
-            past_reflections=past_summary,
+        if prior_learnings:
+            past_summary = f"Prior learnings: {prior_learnings}\nRecent:\n{past_summary}"
+
+        previous_output = clip(previous_output, 900)
+        key = cache_key(
+            "reflection",
+            _REFLECTION_VERSION,
+            _model_name(self.lm),
+            task,
+            previous_output,
+            score,
+            feedback,
+            past_summary,
         )
+        cached = get_cached(key)
+        if cached is None:
+            with _lm_scope(self.lm):
+                result = self.reflector(
+                    task=task,
+                    previous_output=previous_output,
+                    score=score,
+                    feedback=feedback,
+                    past_reflections=past_summary,
+                )
+            cached = {
+                "reflection": result.reflection,
+                "improvement_strategy": result.improvement_strategy,
+            }
+            set_cached(key, cached)
 
         return ReflectionMemory(
-            iteration=len(past_reflections) + 1,
+            iteration=past_reflections[-1].iteration + 1 if past_reflections else 1,
             action_taken=f"Generated output with score {score:.1f}",
             outcome="success" if score >= 7.0 else "needs_improvement",
             score=score,
-            reflection=result.reflection,
-            improvement_suggestion=result.improvement_strategy,
+            reflection=cached["reflection"],
+            improvement_suggestion=cached["improvement_strategy"],
         )
 
 
+class ReflectionMemoryStore(dspy.Module):
+    """Episodic reflections, distilled into one semantic insight every few episodes."""
+
+    def __init__(self, lm: Optional[dspy.LM] = None, consolidate_every: int = 5):
+        super().__init__()
+        self.lm = lm
+        self.consolidate_every = consolidate_every
+        # Bounded so repeated consolidation failures cannot grow the prompt without limit.
+        self.episodic: deque[ReflectionMemory] = deque(maxlen=2 * consolidate_every)
+        self.semantic = ""
+        self.consolidator = _CONSOLIDATOR
+
+    def add(self, memory: ReflectionMemory) -> None:
+        self.episodic.append(memory)
+        if len(self.episodic) >= self.consolidate_every:
+            self.consolidate()
+
+    def consolidate(self) -> None:
+        episodes = "\n".join(_format_reflection(r) for r in self.episodic)
+        if self.semantic:
+            episodes = f"Prior learnings: {self.semantic}\n{episodes}"
+
+        with _lm_scope(self.lm):
+            result = self.consolidator(episodes=episodes)
+
+        self.semantic = result.semantic_insight
+        self.episodic.clear()
+
+
 class ConstitutionalCritic(dspy.Module):
-    def __init__(self):
+    def __init__(self, lm: Optional[dspy.LM] = None):
         super().__init__()
-        self.critic = dspy.ChainOfThought(ConstitutionalCritiqueSignature)
+        self.lm = lm
+        self.critic = _CRITIC
 
     def forward(self, content: str, principles: list[str] = None) -> CritiqueResult:
-        principles = principles or CONSTITUTIONAL_PRINCIPLES
-        principles_text = "\n".join(f"{i + 1}. {p}" for i, p in enumerate(principles))
+        if not principles or principles is CONSTITUTIONAL_PRINCIPLES:
+            principles_text = _DEFAULT_PRINCIPLES_TEXT
+        else:
+            principles_text = _format_principles(principles)
 
-        result = self.critic(content=content[:4000], principles=principles_text)
+        content = clip(content, 1200)
+        key = cache_key("critic", _CRITIC_VERSION, _model_name(self.lm), content, principles_text)
+        cached = get_cached(key)
+        if cached is not None:
+            return CritiqueResult.model_validate(cached)
 
-        severity_map = {"none": "none", "minor": "minor", "major": "major", "critical": "critical"}
-        raw_severity = str(result.severity).lower().strip()
-        severity = severity_map.get(raw_severity, "minor")
+        with _lm_scope(self.lm):
+            result = self.critic(principles=principles_text, content=content)
 
-        return CritiqueResult(
+        critique = CritiqueResult(
             principle_violated=result.violated_principle
             if result.violated_principle.lower() != "none"
             else None,
-            severity=severity,
+            severity=result.severity,
             critique=result.critique,
             revision_request=result.revision_request,
-            is_acceptable=result.is_acceptable
-            if isinstance(result.is_acceptable, bool)
-            else str(result.is_acceptable).lower() == "true",
+            is_acceptable=result.is_acceptable,
         )
+        set_cached(key, critique.model_dump())
+        return critique
 
 
 class SelfHealer(dspy.Module):
-    def __init__(self):
+    def __init__(self, lm: Optional[dspy.LM] = None):
         super().__init__()
-        self.healer = dspy.ChainOfThought(SelfHealingSignature)
+        self.lm = lm
+        self.healer = _HEALER
 
     def forward(
         self, agent_name: str, error_message: str, error_count: int, task_context: str
     ) -> dict:
-        result = self.healer(
-            agent_name=agent_name,
-            error_message=error_message,
-            error_count=error_count,
-            task_context=task_context[:1500],
-        )
+        with _lm_scope(self.lm):
+            result = self.healer(
+                agent_name=agent_name,
+                error_message=error_message,
+                error_count=error_count,
+                task_context=clip(task_context, 450),
+            )
 
         should_retry = result.should_retry
         if isinstance(should_retry, str):
@@ -246,39 +363,97 @@ class SelfHealer(dspy.Module):
 
 
 class ConsensusVoter(dspy.Module):
-    def __init__(self):
+    def __init__(
+        self,
+        lm: Optional[dspy.LM] = None,
+        voter_roles: Optional[list[str]] = None,
+    ):
         super().__init__()
-        self.voter = dspy.ChainOfThought(ConsensusSignature)
+        self.lm = lm
+        self.voters = {role: _role_voter(role) for role in voter_roles or []}
 
     def forward(self, content: str, task: str, voter_role: str) -> ConsensusVote:
-        result = self.voter(content=content[:3000], task=task, voter_role=voter_role)
+        with _lm_scope(self.lm):
+            result = self._voter(voter_role)(content=clip(content, 900), task=task)
+        return self._to_vote(result, voter_role)
 
-        try:
-            score = float(result.score)
-            score = max(0.0, min(10.0, score))
-        except (ValueError, TypeError):
-            score = 5.0
+    async def _avote(self, content: str, task: str, voter_role: str) -> ConsensusVote:
+        with _lm_scope(self.lm):
+            result = await self._voter(voter_role).acall(content=clip(content, 900), task=task)
+        return self._to_vote(result, voter_role)
 
-        try:
-            confidence = float(result.confidence)
-            confidence = max(0.0, min(1.0, confidence))
-        except (ValueError, TypeError):
-            confidence = 0.5
+    def _voter(self, voter_role: str) -> dspy.Predict:
+        if voter_role not in self.voters:
+            self.voters[voter_role] = _role_voter(voter_role)
+        return self.voters[voter_role]
 
-        improvements = [s.strip() for s in str(result.improvements).split(",") if s.strip()]
+    async def stream_votes(
+        self,
+        content: str,
+        task: str,
+        voter_roles: list[str],
+        alpha: float = 0.05,
+        beta: float = 0.1,
+        p0: float = 0.1,
+        p1: float = 0.9,
+    ) -> list[ConsensusVote]:
+        """Collect votes as they arrive and stop once Wald's SPRT reaches a decision.
+
+        Each vote is an agree/disagree observation (score >= 7), weighted by the voter's
+        confidence; H1 says voters agree with probability p1, H0 with probability p0.
+        Pending voters are cancelled once the log-likelihood ratio crosses either bound.
+        Failed voters are logged and skipped.
+        """
+        upper = math.log((1 - beta) / alpha)
+        lower = math.log(beta / (1 - alpha))
+        agree_step = math.log(p1 / p0)
+        disagree_step = math.log((1 - p1) / (1 - p0))
+
+        async def vote_or_none(role: str) -> Optional[ConsensusVote]:
+            try:
+                return await self._avote(content, task, role)
+            except Exception as e:
+                print(f"Consensus voter error ({role}): {e}")
+                return None
+
+        pending = [asyncio.create_task(vote_or_none(role)) for role in voter_roles]
+        votes: list[ConsensusVote] = []
+        llr = 0.0
+        try:
+            for next_vote in asyncio.as_completed(pending):
+                vote = await next_vote
+                if vote is None:
+                    continue
+
+                votes.append(vote)
+                llr += vote.confidence * (agree_step if vote.score >= 7.0 else disagree_step)
+                if llr >= upper or llr <= lower:
+                    break
+        finally:
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return votes
+
+    @staticmethod
+    def _to_vote(result: dspy.Prediction, voter_role: str) -> ConsensusVote:
+        improvements = [s.strip() for s in result.improvements if s.strip()]
 
         return ConsensusVote(
             voter=voter_role,
-            score=score,
+            score=max(0.0, min(10.0, result.score)),
             rationale=result.rationale,
             suggested_improvements=improvements[:5],
+            confidence=max(0.0, min(1.0, result.confidence)),
         )
 
 
 class MetaLearner(dspy.Module):
-    def __init__(self):
+    def __init__(self, lm: Optional[dspy.LM] = None):
         super().__init__()
-        self.learner = dspy.ChainOfThought(MetaLearningSignature)
+        self.lm = lm
+        self.learner = _LEARNER
 
     def forward(
         self,
@@ -287,7 +462,8 @@ class MetaLearner(dspy.Module):
         failed_patterns: list[str],
         current_state: MetaLearningState,
     ) -> MetaLearningState:
-        if not scores:
+        # Too little history, or a flat last step, gives the learner nothing to adapt to.
+        if len(scores) < 3 or abs(scores[-1] - scores[-2]) < 0.3:
             return current_state
 
         performance_history = " -> ".join([f"{s:.1f}" for s in scores[-5:]])
@@ -301,27 +477,22 @@ class MetaLearner(dspy.Module):
         )
         performance_history = f"{performance_history} (trend: {trend})"
 
-        result = self.learner(
-            performance_history=performance_history,
-            successful_patterns=", ".join(successful_patterns[-5:])
-            if successful_patterns
-            else "No successful patterns recorded yet",
-            failed_patterns=", ".join(failed_patterns[-5:])
-            if failed_patterns
-            else "No failed patterns recorded yet",
-            current_strategy=str(current_state.strategy_weights),
-        )
+        with _lm_scope(self.lm):
+            result = self.learner(
+                performance_history=performance_history,
+                successful_patterns=", ".join(successful_patterns[-5:])
+                if successful_patterns
+                else "No successful patterns recorded yet",
+                failed_patterns=", ".join(failed_patterns[-5:])
+                if failed_patterns
+                else "No failed patterns recorded yet",
+                current_strategy=json.dumps(
+                    {k: round(v, 2) for k, v in current_state.strategy_weights.items()},
+                    sort_keys=True,
+                ),
+            )
 
-        new_weights = current_state.strategy_weights.copy()
-        try:
-            for pair in str(result.new_weights).split(","):
-                if ":" in pair:
-                    key, value = pair.split(":", 1)
-                    key = key.strip()
-                    if key in new_weights:
-                        new_weights[key] = max(0.0, min(1.0, float(value.strip())))
-        except (ValueError, AttributeError):
-            pass
+        new_weights = {**current_state.strategy_weights, **result.new_weights.model_dump()}
 
         new_successful = successful_patterns.copy()
         new_failed = failed_patterns.copy()
@@ -339,10 +510,25 @@ class MetaLearner(dspy.Module):
         )
 
 
+class _LMScoped(dspy.Module):
+    """Runs a predictor under the LM override from inside forward, so a streaming caller never
+    holds a dspy.context open across a yield."""
+
+    def __init__(self, predictor: dspy.Module, lm: Optional[dspy.LM]):
+        super().__init__()
+        self.predictor = predictor
+        self.lm = lm
+
+    def forward(self, **kwargs) -> dspy.Prediction:
+        with _lm_scope(self.lm):
+            return self.predictor(**kwargs)
+
+
 class SelfRefiner(dspy.Module):
-    def __init__(self):
+    def __init__(self, lm: Optional[dspy.LM] = None):
         super().__init__()
-        self.refiner = dspy.ChainOfThought(SelfRefineSignature)
+        self.lm = lm
+        self.refiner = _REFINER
 
     def forward(
         self,
@@ -352,20 +538,61 @@ class SelfRefiner(dspy.Module):
         reflection_insights: str,
         intensity: str = "Standard",
     ) -> dict:
-        result = self.refiner(
-            task=task,
-            current_content=current_content
+        with _lm_scope(self.lm):
+            result = self.refiner(
+                **self._inputs(task, current_content, self_critique, reflection_insights, intensity)
+            )
+
+        return self._to_dict(result)
+
+    async def astream(
+        self,
+        task: str,
+        current_content: str,
+        self_critique: str,
+        reflection_insights: str,
+        intensity: str = "Standard",
+    ) -> AsyncIterator[Union[str, dict]]:
+        """Yield refined_content chunks as they are generated, then the same dict as forward().
+
+        Closing the iterator early cancels the generation.
+        """
+        program = dspy.streamify(
+            _LMScoped(self.refiner, self.lm),
+            stream_listeners=[StreamListener(signature_field_name="refined_content")],
+        )
+        async for chunk in program(
+            **self._inputs(task, current_content, self_critique, reflection_insights, intensity)
+        ):
+            if isinstance(chunk, StreamResponse):
+                yield chunk.chunk
+            elif isinstance(chunk, dspy.Prediction):
+                yield self._to_dict(chunk)
+
+    @staticmethod
+    def _inputs(
+        task: str,
+        current_content: str,
+        self_critique: str,
+        reflection_insights: str,
+        intensity: str,
+    ) -> dict:
+        return {
+            "task": task,
+            "current_content": current_content
             if current_content
             else "No content yet - create initial draft.",
-            self_critique=self_critique
+            "self_critique": self_critique
             if self_critique
             else "No critique yet - focus on creating comprehensive initial content.",
-            reflection_insights=reflection_insights
+            "reflection_insights": reflection_insights
             if reflection_insights
             else "First iteration - no prior insights.",
-            intensity=intensity,
-        )
+            "intensity": intensity,
+        }
 
+    @staticmethod
+    def _to_dict(result: dspy.Prediction) -> dict:
         return {
             "refined_content": result.refined_content,
             "changes_made": result.changes_made,
@@ -2,12 +2,61 @@
 
 import operator
 from typing import Annotated, TypedDict, Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, field_validator
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
 from datetime import datetime
 
 
+# Voter roles and agent names come from small fixed sets; the cap keeps any unexpected
+# free text from growing the table in a long-running server.
+_SHARED_NAMES: dict[str, str] = {}
+_SHARED_NAMES_MAX = 256
+
+
+def _share_name(value: str) -> str:
+    """Share one string object per voter role / agent name across long-running histories."""
+    shared = _SHARED_NAMES.get(value)
+    if shared is not None:
+        return shared
+    if len(_SHARED_NAMES) < _SHARED_NAMES_MAX:
+        _SHARED_NAMES[value] = value
+    return value
+
+
+def _canonical_principle(value: Optional[str]) -> Optional[str]:
+    """Resolve a violated principle to the shared CONSTITUTIONAL_PRINCIPLES entry if it names one."""
+    if value is None:
+        return None
+    key = value.strip().lstrip("0123456789.) ").lower()
+    return _PRINCIPLES_BY_TEXT.get(key, value)
+
+
+SEVERITY_LEVELS = ("none", "minor", "major", "critical")
+
+
+def _normalize_severity(value) -> str:
+    """LMs capitalize or invent severity labels; anything unrecognized counts as minor."""
+    severity = str(value).strip().lower()
+    return severity if severity in SEVERITY_LEVELS else "minor"
+
+
+Severity = Annotated[Literal[SEVERITY_LEVELS], BeforeValidator(_normalize_severity)]
+
+
+def _clamp_unit(value) -> float:
+    return min(1.0, max(0.0, float(value)))
+
+
+def keep_last(n: int):
+    """Reducer that appends updates like operator.add but keeps only the newest n entries."""
+
+    def _reduce(current: list, update: list) -> list:
+        return (current + update)[-n:]
+
+    return _reduce
+
+
 class AgentOutput(BaseModel):
     agent_name: str = Field(description="Name of the agent")
     content: str = Field(description="Agent's output content")
@@ -33,11 +82,13 @@ class CritiqueResult(BaseModel):
     principle_violated: Optional[str] = Field(
         default=None, description="Which principle was violated, if any"
     )
-    severity: Literal["none", "minor", "major", "critical"] = Field(default="none")
+    severity: Severity = Field(default="none")
     critique: str = Field(description="Detailed critique")
     revision_request: str = Field(description="Specific request for revision")
     is_acceptable: bool = Field(default=True)
 
+    _canonical_principle = field_validator("principle_violated")(_canonical_principle)
+
 
 class HealthStatus(BaseModel):
     """Self-healing health tracking."""
@@ -49,6 +100,8 @@ class HealthStatus(BaseModel):
     recovery_attempts: int = 0
     last_successful_run: Optional[str] = None
 
+    _share_agent_name = field_validator("agent_name")(_share_name)
+
 
 class ConsensusVote(BaseModel):
     """Multi-agent debate vote."""
@@ -57,11 +110,27 @@ class ConsensusVote(BaseModel):
     score: float
     rationale: str
     suggested_improvements: list[str] = Field(default_factory=list)
+    confidence: float = Field(default=0.5, description="Voter confidence 0-1")
+
+    _share_voter = field_validator("voter")(_share_name)
+
+
+class StrategyWeights(BaseModel):
+    """Strategy weights proposed by the meta-learner."""
+
+    depth_vs_breadth: float = Field(ge=0.0, le=1.0)
+    creativity_vs_precision: float = Field(ge=0.0, le=1.0)
+    exploration_vs_exploitation: float = Field(ge=0.0, le=1.0)
+
+    _clamp_weights = field_validator("*", mode="before")(_clamp_unit)
 
 
 class MetaLearningState(BaseModel):
     """Meta-learner state for strategy adaptation."""
 
+    # MetaLearner always returns a new state, so instances are never mutated in place.
+    model_config = ConfigDict(frozen=True)
+
     strategy_weights: dict[str, float] = Field(
         default_factory=lambda: {
             "depth_vs_breadth": 0.5,
@@ -75,6 +144,8 @@ class MetaLearningState(BaseModel):
 
 
 class MemoryConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     provider_type: Literal["hierarchical", "dual_buffer", "simple"] = "hierarchical"
     max_short_term: int = Field(default=10)
     max_long_term: int = Field(default=30)
@@ -84,6 +155,8 @@ class MemoryConfig(BaseModel):
 
 
 class OptimizationConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     objectives: list[str] = Field(default_factory=lambda: ["accuracy", "completeness", "clarity"])
     epsilon: float = Field(default=0.1)
     enable_reflective_mutation: bool = True
@@ -99,14 +172,14 @@ class AgentState(TypedDict):
     agent_outputs: Annotated[list[AgentOutput], operator.add]
     current_draft: str
 
-    scores: Annotated[list[float], operator.add]
-    feedback_history: Annotated[list[str], operator.add]
+    scores: Annotated[list[float], keep_last(20)]
+    feedback_history: Annotated[list[str], keep_last(20)]
 
     iteration: int
     max_iterations: int
     is_boosted: bool
 
-    reflection_memories: Annotated[list[ReflectionMemory], operator.add]
+    reflection_memories: Annotated[list[ReflectionMemory], keep_last(10)]
 
     critiques: Annotated[list[CritiqueResult], operator.add]
     constitutional_principles: list[str]
@@ -115,7 +188,9 @@ class AgentState(TypedDict):
     global_health: Literal["healthy", "degraded", "critical"]
     recovery_mode: bool
 
-    consensus_votes: Annotated[list[ConsensusVote], operator.add]
+    consensus_votes: Annotated[list[ConsensusVote], keep_last(16)]
+    # Votes from the most recent round only; early stopping makes rounds vary in size.
+    latest_consensus: list[ConsensusVote]
     consensus_threshold: float
 
     meta_state: MetaLearningState
@@ -123,6 +198,9 @@ class AgentState(TypedDict):
     memory_config: MemoryConfig
     optimization_config: OptimizationConfig
 
+    # Path of the on-disk archive holding the full, unbounded history (see src/archive.py).
+    trajectory_archive: str
+
     final_document: str
     diagram: str
 
@@ -138,6 +216,14 @@ CONSTITUTIONAL_PRINCIPLES = [
     "Improvements should be measurable and concrete",
 ]
 
+_PRINCIPLES_BY_TEXT = {p.lower(): p for p in CONSTITUTIONAL_PRINCIPLES}
+
+
+# Configs and meta state are frozen, so every new state can share the same defaults.
+_DEFAULT_META_STATE = MetaLearningState()
+_DEFAULT_MEMORY_CONFIG = MemoryConfig()
+_DEFAULT_OPTIMIZATION_CONFIG = OptimizationConfig()
+
 
 def create_initial_state(user_input: str) -> AgentState:
     from langchain_core.messages import HumanMessage
@@ -159,10 +245,12 @@ def create_initial_state(user_input: str) -> AgentState:
         global_health="healthy",
         recovery_mode=False,
         consensus_votes=[],
+        latest_consensus=[],
         consensus_threshold=0.7,
-        meta_state=MetaLearningState(),
-        memory_config=MemoryConfig(),
-        optimization_config=OptimizationConfig(),
+        meta_state=_DEFAULT_META_STATE,
+        memory_config=_DEFAULT_MEMORY_CONFIG,
+        optimization_config=_DEFAULT_OPTIMIZATION_CONFIG,
+        trajectory_archive="",
         final_document="",
         diagram="",
     )
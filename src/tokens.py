@@ -0,0 +1,36 @@
+"""Token-budget truncation for prompt inputs."""
+
+from functools import lru_cache
+from typing import Optional
+
+import tiktoken
+
+TOKENIZER_MODEL = "gpt-4o"
+# Used only when the tokenizer's BPE file cannot be loaded (e.g. offline); matches the
+# character limits the token budgets replaced (3000 chars for 900 tokens).
+CHARS_PER_TOKEN = 10 / 3
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Optional[tiktoken.Encoding]:
+    try:
+        return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    except Exception:
+        return None
+
+
+def clip(text: str, n_tokens: int) -> str:
+    enc = _encoding()
+    if enc is None:
+        return text[: int(n_tokens * CHARS_PER_TOKEN)]
+
+    # Every byte-level BPE token covers at least one UTF-8 byte, so text with no more bytes
+    # than the budget cannot exceed it. Characters are not enough: CJK and emoji take
+    # several tokens each.
+    if len(text.encode()) <= n_tokens:
+        return text
+
+    ids = enc.encode(text, disallowed_special=())
+    if len(ids) <= n_tokens:
+        return text
+    return enc.decode(ids[:n_tokens])
@@ -1,16 +1,68 @@
 import asyncio
+import hashlib
 import os
 import re
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Union
 from urllib.parse import quote_plus, urljoin, urlparse
 
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 from crawl4ai.content_filter_strategy import PruningContentFilter
 
+# Hosts whose browser sessions are kept for keep-alive reuse; the least recently used is closed.
+MAX_HOST_SESSIONS = 16
 
-@dataclass
+# Browser sessions per host; a session is one page, so this bounds parallel crawls of one host.
+HOST_SESSION_POOL = 2
+
+# Result links sit near the top of a search page; the rest is never worth scanning.
+SEARCH_SCAN_LIMIT = 64 * 1024
+
+_URL_RE = re.compile(r'https?://[^\s<>"\')\]]+')
+
+_EXCLUDED_DOMAINS = frozenset(
+    [
+        "google.com",
+        "bing.com",
+        "duckduckgo.com",
+        "facebook.com",
+        "twitter.com",
+        "instagram.com",
+        "youtube.com",
+        "linkedin.com",
+        "pinterest.com",
+        "reddit.com/user/",
+        "t.co",
+        "bit.ly",
+    ]
+)
+_EXCLUDED_RE = re.compile("|".join(map(re.escape, sorted(_EXCLUDED_DOMAINS))))
+
+
+def _count_tokens(text: str) -> int:
+    """Whitespace word count without building the list that str.split() would."""
+    return text.count(" ") + text.count("\n") + 1 if text else 0
+
+
+_ENGINE_TEMPLATES = {
+    "duckduckgo": "https://html.duckduckgo.com/html/?q={}",
+    "google": "https://www.google.com/search?q={}",
+    "bing": "https://www.bing.com/search?q={}",
+}
+
+
+@lru_cache(maxsize=256)
+def _build_search_url(query: str, engine: str) -> str:
+    return _ENGINE_TEMPLATES.get(engine, _ENGINE_TEMPLATES["duckduckgo"]).format(
+        quote_plus(query)
+    )
+
+
+@dataclass(slots=True)
 class SearchResult:
     url: str
     title: str
@@ -18,9 +70,10 @@ class SearchResult:
     snippet: str
     score: float = 0.0
     source: str = "web"
+    token_count: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class WebSearchResponse:
     query: str
     results: list[SearchResult] = field(default_factory=list)
@@ -29,16 +82,29 @@ class WebSearchResponse:
     error: Optional[str] = None
 
 
+@dataclass(slots=True)
+class _CrawlerSession:
+    crawler: AsyncWebCrawler
+    # Created with the crawler so it binds to the event loop the crawler runs on.
+    sem: asyncio.Semaphore
+    # host key -> idle session configs; a full pool has nothing mid-crawl.
+    sessions: OrderedDict[str, asyncio.Queue[CrawlerRunConfig]] = field(
+        default_factory=OrderedDict
+    )
+
+
 class WebSearchAgent:
     def __init__(
         self,
         max_results: int = 5,
         content_threshold: float = 0.5,
         timeout: int = 30000,
+        max_concurrent: int = 8,
     ):
         self.max_results = max_results
         self.content_threshold = content_threshold
         self.timeout = timeout
+        self.max_concurrent = max_concurrent
 
         self.browser_config = BrowserConfig(
             headless=True,
@@ -58,56 +124,99 @@ class WebSearchAgent:
                 options={"ignore_links": False},
             ),
         )
+        # Result pages are articles: prune short boilerplate nodes before markdown generation.
+        self.crawl_config_fast = self.crawl_config.clone(
+            page_timeout=15000,
+            markdown_generator=DefaultMarkdownGenerator(
+                content_filter=PruningContentFilter(
+                    threshold=content_threshold,
+                    threshold_type="fixed",
+                    min_word_threshold=100,
+                ),
+                options={"ignore_links": False, "escape_dot": False},
+            ),
+        )
 
-    async def search(self, query: str, search_engine: str = "duckduckgo") -> WebSearchResponse:
-        search_url = self._build_search_url(query, search_engine)
+        self._session: Optional[_CrawlerSession] = None
+
+    async def __aenter__(self) -> "WebSearchAgent":
+        crawler = AsyncWebCrawler(config=self.browser_config)
+        await crawler.__aenter__()
+        self._session = _CrawlerSession(crawler, asyncio.Semaphore(self.max_concurrent))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        session, self._session = self._session, None
+        if session is not None:
+            await session.crawler.__aexit__(exc_type, exc, tb)
+
+    @asynccontextmanager
+    async def _crawler_session(self):
+        """Yield the shared session inside `async with agent`, else a crawler for this call only."""
+        if self._session is not None:
+            yield self._session
+        else:
+            async with AsyncWebCrawler(config=self.browser_config) as crawler:
+                yield _CrawlerSession(crawler, asyncio.Semaphore(self.max_concurrent))
 
+    async def search(self, query: str, search_engine: str = "duckduckgo") -> WebSearchResponse:
         try:
-            async with AsyncWebCrawler(config=self.browser_config) as crawler:
-                result = await crawler.arun(url=search_url, config=self.crawl_config)
+            async with self._crawler_session() as session:
+                return await self._search(session, query, search_engine)
+        except Exception as e:
+            return WebSearchResponse(query=query, error=str(e))
 
-                if not result.success:
-                    return WebSearchResponse(
-                        query=query, error=f"Search failed: {result.error_message}"
-                    )
+    async def _search(
+        self, session: _CrawlerSession, query: str, search_engine: str
+    ) -> WebSearchResponse:
+        found = await self._find_result_urls(session.crawler, query, search_engine)
+        if isinstance(found, WebSearchResponse):
+            return found
 
-                urls = self._extract_search_urls(result, search_engine)
-
-                if not urls:
-                    return WebSearchResponse(
-                        query=query,
-                        results=[
-                            SearchResult(
-                                url=search_url,
-                                title="Search Results",
-                                content=result.markdown.raw_markdown[:2000]
-                                if result.markdown
-                                else "",
-                                snippet=result.markdown.raw_markdown[:500]
-                                if result.markdown
-                                else "",
-                                source=search_engine,
-                            )
-                        ],
-                        sources_crawled=1,
-                    )
+        search_results = await self._crawl_urls(session, found)
 
-                search_results = await self._crawl_urls(crawler, urls[: self.max_results])
+        return WebSearchResponse(
+            query=query,
+            results=search_results,
+            sources_crawled=len(search_results),
+            total_tokens=sum(r.token_count for r in search_results),
+        )
 
-                return WebSearchResponse(
-                    query=query,
-                    results=search_results,
-                    sources_crawled=len(search_results),
-                    total_tokens=sum(len(r.content.split()) for r in search_results),
-                )
+    async def _find_result_urls(
+        self, crawler, query: str, search_engine: str
+    ) -> Union[list[str], WebSearchResponse]:
+        """Top result URLs to crawl, or the final response when there is nothing to crawl."""
+        search_url = self._build_search_url(query, search_engine)
+        result = await crawler.arun(url=search_url, config=self.crawl_config)
+
+        if not result.success:
+            return WebSearchResponse(query=query, error=f"Search failed: {result.error_message}")
+
+        urls = self._extract_search_urls(result, search_engine)
+
+        if not urls:
+            content = result.markdown.raw_markdown[:2000] if result.markdown else ""
+            return WebSearchResponse(
+                query=query,
+                results=[
+                    SearchResult(
+                        url=search_url,
+                        title="Search Results",
+                        content=content,
+                        snippet=content[:500],
+                        source=search_engine,
+                        token_count=_count_tokens(content),
+                    )
+                ],
+                sources_crawled=1,
+            )
 
-        except Exception as e:
-            return WebSearchResponse(query=query, error=str(e))
+        return urls[: self.max_results]
 
     async def crawl_url(self, url: str) -> SearchResult:
         try:
-            async with AsyncWebCrawler(config=self.browser_config) as crawler:
-                result = await crawler.arun(url=url, config=self.crawl_config)
+            async with self._crawler_session() as session:
+                result = await session.crawler.arun(url=url, config=self.crawl_config)
 
                 if not result.success:
                     return SearchResult(
@@ -118,24 +227,23 @@ class WebSearchAgent:
                         score=0.0,
                     )
 
-                title = (
-                    result.metadata.get("title", urlparse(url).netloc)
-                    if result.metadata
-                    else urlparse(url).netloc
-                )
+                netloc = urlparse(url).netloc
+                title = (result.metadata.get("title") or netloc) if result.metadata else netloc
                 content = (
                     result.markdown.fit_markdown or result.markdown.raw_markdown
                     if result.markdown
                     else ""
                 )
 
+                body = content[:10000]
                 return SearchResult(
                     url=url,
                     title=title,
-                    content=content[:10000],
-                    snippet=content[:500],
+                    content=body,
+                    snippet=body[:500],
                     score=1.0,
                     source="direct",
+                    token_count=_count_tokens(body),
                 )
         except Exception as e:
             return SearchResult(url=url, title="Error", content=str(e), snippet="", score=0.0)
@@ -143,115 +251,143 @@ class WebSearchAgent:
     async def research_topic(
         self, topic: str, depth: int = 2, max_pages: int = 10
     ) -> WebSearchResponse:
-        all_results: list[SearchResult] = []
-        crawled_urls: set[str] = set()
-
-        initial_response = await self.search(topic)
-        if initial_response.error:
-            return initial_response
-
-        all_results.extend(initial_response.results)
-        crawled_urls.update(r.url for r in initial_response.results)
-
-        if depth > 1 and len(all_results) < max_pages:
-            follow_urls = []
-            for result in initial_response.results[:3]:
-                links = self._extract_links_from_content(result.content)
-                for link in links[:2]:
-                    if link not in crawled_urls and len(follow_urls) < max_pages - len(all_results):
-                        follow_urls.append(link)
-
-            if follow_urls:
-                async with AsyncWebCrawler(config=self.browser_config) as crawler:
-                    follow_results = await self._crawl_urls(crawler, follow_urls)
-                    all_results.extend(follow_results)
-                    crawled_urls.update(r.url for r in follow_results)
+        try:
+            async with self._crawler_session() as session:
+                return await self._research_topic(session, topic, depth, max_pages)
+        except Exception as e:
+            return WebSearchResponse(query=topic, error=str(e))
+
+    async def _research_topic(
+        self, session: _CrawlerSession, topic: str, depth: int, max_pages: int
+    ) -> WebSearchResponse:
+        found = await self._find_result_urls(session.crawler, topic, "duckduckgo")
+        if isinstance(found, WebSearchResponse):
+            return found
+
+        initial: list[tuple[int, SearchResult]] = []
+        followed: list[SearchResult] = []
+        crawled_urls = set(found)
+        queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        # Initial crawls still in flight may yet succeed, so they keep their page slot
+        # until they fail; follow-up links only take slots that are left over.
+        reserved = len(found)
+        queued = 0
+
+        async def follow() -> None:
+            while (url := await queue.get()) is not None:
+                result = await self._crawl_single(session, url)
+                if result and result.score > 0:
+                    followed.append(result)
+
+        async def crawl_initial(rank: int, url: str) -> tuple[int, Optional[SearchResult]]:
+            return rank, await self._crawl_single(session, url)
+
+        n_workers = min(self.max_concurrent, max_pages) if depth > 1 else 0
+        workers = [asyncio.create_task(follow()) for _ in range(n_workers)]
+        tasks = [asyncio.create_task(crawl_initial(rank, url)) for rank, url in enumerate(found)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                rank, result = await next_result
+                if not (result and result.score > 0):
+                    reserved -= 1
+                    continue
+
+                initial.append((rank, result))
+                # Links are followed from the top three search results, as each one lands.
+                if workers and rank < 3:
+                    for link in self._extract_links_from_content(result.content, limit=2):
+                        if link not in crawled_urls and reserved + queued < max_pages:
+                            crawled_urls.add(link)
+                            queued += 1
+                            queue.put_nowait(link)
+
+            for _ in workers:
+                queue.put_nowait(None)
+            await asyncio.gather(*workers)
+        finally:
+            for t in tasks + workers:
+                t.cancel()
+
+        initial.sort(key=lambda item: item[0])
+        all_results = [result for _, result in initial] + followed
 
         return WebSearchResponse(
             query=topic,
             results=all_results,
-            sources_crawled=len(crawled_urls),
-            total_tokens=sum(len(r.content.split()) for r in all_results),
+            sources_crawled=len(all_results),
+            total_tokens=sum(r.token_count for r in all_results),
         )
 
     def _build_search_url(self, query: str, engine: str) -> str:
-        encoded_query = quote_plus(query)
-
-        engines = {
-            "duckduckgo": f"https://html.duckduckgo.com/html/?q={encoded_query}",
-            "google": f"https://www.google.com/search?q={encoded_query}",
-            "bing": f"https://www.bing.com/search?q={encoded_query}",
-        }
-
-        return engines.get(engine, engines["duckduckgo"])
+        return _build_search_url(query, engine)
 
     def _extract_search_urls(self, result, engine: str) -> list[str]:
         urls = []
+        seen: set[str] = set()
+        limit = self.max_results * 2
 
         if result.links:
             external_links = result.links.get("external", [])
             for link in external_links:
                 href = link.get("href", "")
-                if href and self._is_valid_result_url(href, engine):
+                if href and href not in seen and self._is_valid_result_url(href, engine):
+                    seen.add(href)
                     urls.append(href)
+                    if len(urls) >= limit:
+                        return urls
 
         if result.markdown and result.markdown.raw_markdown:
-            url_pattern = r'https?://[^\s<>"\')\]]+'
-            found_urls = re.findall(url_pattern, result.markdown.raw_markdown)
-            for url in found_urls:
-                url = url.rstrip(".,;:")
-                if url not in urls and self._is_valid_result_url(url, engine):
+            for match in _URL_RE.finditer(result.markdown.raw_markdown[:SEARCH_SCAN_LIMIT]):
+                url = match.group().rstrip(".,;:")
+                if url not in seen and self._is_valid_result_url(url, engine):
+                    seen.add(url)
                     urls.append(url)
+                    if len(urls) >= limit:
+                        break
 
-        return urls[: self.max_results * 2]
+        return urls
 
     def _is_valid_result_url(self, url: str, engine: str) -> bool:
-        excluded_domains = [
-            "google.com",
-            "bing.com",
-            "duckduckgo.com",
-            "facebook.com",
-            "twitter.com",
-            "instagram.com",
-            "youtube.com",
-            "linkedin.com",
-            "pinterest.com",
-            "reddit.com/user/",
-            "t.co",
-            "bit.ly",
-        ]
-
-        for domain in excluded_domains:
-            if domain in url:
-                return False
-
-        return url.startswith("http") and len(url) > 20
-
-    async def _crawl_urls(self, crawler, urls: list[str]) -> list[SearchResult]:
-        results = []
-
-        tasks = [self._crawl_single(crawler, url) for url in urls]
-        crawl_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for url, crawl_result in zip(urls, crawl_results):
-            if isinstance(crawl_result, Exception):
+        if not (url.startswith("http") and len(url) > 20):
+            return False
+
+        return _EXCLUDED_RE.search(url) is None
+
+    async def _crawl_urls(self, session: _CrawlerSession, urls: list[str]) -> list[SearchResult]:
+        ranked: list[tuple[int, SearchResult]] = []
+
+        async def crawl(rank: int, url: str) -> tuple[int, Optional[SearchResult]]:
+            return rank, await self._crawl_single(session, url)
+
+        tasks = [asyncio.create_task(crawl(rank, url)) for rank, url in enumerate(urls)]
+        for next_result in asyncio.as_completed(tasks):
+            try:
+                rank, crawl_result = await next_result
+            except Exception:
                 continue
             if crawl_result and crawl_result.score > 0:
-                results.append(crawl_result)
+                ranked.append((rank, crawl_result))
 
-        return results
+        # Results are collected as they finish but returned in the order the URLs were ranked.
+        ranked.sort(key=lambda item: item[0])
+        return [result for _, result in ranked]
 
-    async def _crawl_single(self, crawler, url: str) -> Optional[SearchResult]:
+    async def _crawl_single(self, session: _CrawlerSession, url: str) -> Optional[SearchResult]:
         try:
-            config = self.crawl_config.clone(page_timeout=15000)
-            result = await crawler.arun(url=url, config=config)
+            netloc = urlparse(url).netloc
+            pool, config = await self._host_session(session, netloc)
+            try:
+                async with session.sem:
+                    result = await session.crawler.arun(url=url, config=config)
+            finally:
+                pool.put_nowait(config)
 
             if not result.success:
                 return None
 
             title = result.metadata.get("title", "") if result.metadata else ""
             if not title:
-                title = urlparse(url).netloc
+                title = netloc
 
             content = ""
             if result.markdown:
@@ -260,33 +396,83 @@ class WebSearchAgent:
             if len(content) < 100:
                 return None
 
+            body = content[:8000]
             return SearchResult(
                 url=url,
                 title=title,
-                content=content[:8000],
-                snippet=content[:400],
+                content=body,
+                snippet=body[:400],
                 score=min(len(content) / 1000, 1.0),
                 source="crawl",
+                token_count=_count_tokens(body),
             )
         except Exception:
             return None
 
-    def _extract_links_from_content(self, content: str) -> list[str]:
-        url_pattern = r'https?://[^\s<>"\')\]]+'
-        urls = re.findall(url_pattern, content)
-        return [url.rstrip(".,;:") for url in urls if self._is_valid_result_url(url, "")]
+    async def _host_session(
+        self, session: _CrawlerSession, netloc: str
+    ) -> tuple[asyncio.Queue[CrawlerRunConfig], CrawlerRunConfig]:
+        """Take an idle session config for `netloc`; the caller returns it to the pool."""
+        key = hashlib.md5(netloc.encode()).hexdigest()
+        pool = session.sessions.get(key)
+        if pool is not None:
+            session.sessions.move_to_end(key)
+            return pool, await pool.get()
+
+        pool = asyncio.Queue(maxsize=HOST_SESSION_POOL)
+        for i in range(HOST_SESSION_POOL):
+            pool.put_nowait(self.crawl_config_fast.clone(session_id=f"{key}-{i}"))
+
+        # Evict least recently used hosts that have no crawl in flight.
+        stale: list[str] = []
+        for old_key, old_pool in list(session.sessions.items()):
+            if len(session.sessions) < MAX_HOST_SESSIONS:
+                break
+            if old_pool.full():
+                del session.sessions[old_key]
+                stale.extend(f"{old_key}-{i}" for i in range(HOST_SESSION_POOL))
+
+        # Taken before any await so the new pool is never idle, hence never evicted, unused.
+        session.sessions[key] = pool
+        config = pool.get_nowait()
+        try:
+            for session_id in stale:
+                try:
+                    await session.crawler.crawler_strategy.kill_session(session_id)
+                except Exception:
+                    pass
+        except BaseException:
+            pool.put_nowait(config)
+            raise
+
+        return pool, config
+
+    def _extract_links_from_content(self, content: str, limit: Optional[int] = None) -> list[str]:
+        links = []
+        seen: set[str] = set()
+        for match in _URL_RE.finditer(content):
+            url = match.group()
+            if not self._is_valid_result_url(url, ""):
+                continue
+            url = url.rstrip(".,;:")
+            if url not in seen:
+                seen.add(url)
+                links.append(url)
+                if limit is not None and len(links) >= limit:
+                    break
+        return links
 
 
 async def web_search(query: str, max_results: int = 5) -> WebSearchResponse:
-    agent = WebSearchAgent(max_results=max_results)
-    return await agent.search(query)
+    async with WebSearchAgent(max_results=max_results) as agent:
+        return await agent.search(query)
 
 
 async def crawl_page(url: str) -> SearchResult:
-    agent = WebSearchAgent()
-    return await agent.crawl_url(url)
+    async with WebSearchAgent() as agent:
+        return await agent.crawl_url(url)
 
 
 async def research(topic: str, depth: int = 2, max_pages: int = 10) -> WebSearchResponse:
-    agent = WebSearchAgent()
-    return await agent.research_topic(topic, depth=depth, max_pages=max_pages)
+    async with WebSearchAgent() as agent:
+        return await agent.research_topic(topic, depth=depth, max_pages=max_pages)
@@ -0,0 +1,51 @@
+import hashlib
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def task_id(request):
+    """Task id unique to the test, so tests touching the graph's provider caches can run in parallel."""
+    return "test_" + hashlib.sha1(request.node.nodeid.encode()).hexdigest()[:12]
+
+
+@pytest.fixture
+def mock_dspy():
+    with patch("src.optimization.reflective_mutation.dspy") as mock:
+        yield mock
+
+
+@pytest.fixture(scope="module")
+def mock_dspy_chain():
+    """Stand-in for the dspy module whose ChainOfThought predictors return one fixed prediction."""
+    prediction = SimpleNamespace(
+        analysis="Prompt lacks specificity about required sections",
+        root_cause="Missing structural guidance",
+        improvement="Add explicit section requirements",
+        confidence=0.8,
+        merged_content="Combined best aspects: thorough and efficient",
+        rationale="Merged thoroughness from C1 with efficiency from C2",
+    )
+    return SimpleNamespace(ChainOfThought=lambda signature: lambda **inputs: prediction)
+
+
+@pytest.fixture(scope="module")
+def mock_reflection_agent():
+    """Stand-in for the ReflectionAgent class; every instance returns the same reflection."""
+    memory = SimpleNamespace(iteration=1, score=7.5, improvement_suggestion="Add more detail")
+    return lambda **kwargs: lambda **inputs: memory
+
+
+@pytest.fixture
+def mock_memory_provider():
+    """Memory provider stand-in that records the trajectories it is given."""
+    provider = SimpleNamespace(stored=[])
+
+    def take_in_memory(trajectory):
+        provider.stored.append(trajectory)
+        return True, "Stored learning"
+
+    provider.take_in_memory = take_in_memory
+    return provider
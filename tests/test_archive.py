@@ -0,0 +1,18 @@
+import json
+
+from src.archive import append_record
+from src.state import ConsensusVote
+
+
+def test_append_record_writes_json_lines(tmp_path):
+    """Test records, including pydantic payloads, are appended as one JSON object per line."""
+    path = str(tmp_path / "run.jsonl")
+
+    append_record(path, "judge", 1, {"score": 6.5})
+    append_record(path, "consensus", 1, [ConsensusVote(voter="Reviewer", score=8.0, rationale="ok")])
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+
+    assert [r["kind"] for r in records] == ["judge", "consensus"]
+    assert records[1]["payload"][0]["voter"] == "Reviewer"
@@ -0,0 +1,45 @@
+import asyncio
+
+from src.graph import consensus_node, route_after_evolution
+from src.state import ConsensusVote, create_initial_state
+
+
+def _vote(score: float) -> ConsensusVote:
+    return ConsensusVote(voter="Reviewer", score=score, rationale="")
+
+
+def test_route_after_evolution_uses_latest_round_only():
+    """Test an early-stopped round is not averaged with votes cast on an earlier draft."""
+    state = create_initial_state("Test task")
+    state["iteration"] = 2
+    state["scores"] = [7.0]
+    state["consensus_votes"] = [_vote(9.5), _vote(6.0), _vote(6.0)]
+    state["latest_consensus"] = [_vote(6.0), _vote(6.0)]
+
+    assert route_after_evolution(state) == "loop_decision"
+
+    state["latest_consensus"] = [_vote(9.0), _vote(8.5)]
+    assert route_after_evolution(state) == "diagram"
+
+
+def test_consensus_node_runs_inside_an_event_loop(monkeypatch):
+    """Test the sync node still collects votes when its thread already runs an event loop."""
+
+    class FakeVoter:
+        def __init__(self, **kwargs):
+            pass
+
+        async def stream_votes(self, content, task, voter_roles):
+            return [_vote(8.0), _vote(9.0)]
+
+    monkeypatch.setattr("src.graph.ConsensusVoter", FakeVoter)
+    state = create_initial_state("Test task")
+    state["current_draft"] = "Draft"
+
+    async def call_from_loop():
+        return consensus_node(state)
+
+    result = asyncio.run(call_from_loop())
+
+    assert [v.score for v in result["latest_consensus"]] == [8.0, 9.0]
+    assert result["consensus_votes"] == result["latest_consensus"]
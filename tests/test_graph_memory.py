@@ -4,27 +4,27 @@ from src.state import create_initial_state, MemoryConfig, OptimizationConfig
 from src.memory import HierarchicalMemory, DualBufferMemory
 
 
-def test_get_memory_provider_hierarchical():
+def test_get_memory_provider_hierarchical(task_id):
     """Test hierarchical memory provider creation."""
     config = MemoryConfig(provider_type="hierarchical")
-    provider = _get_memory_provider(config, "test_task_1")
+    provider = _get_memory_provider(config, task_id)
 
     assert isinstance(provider, HierarchicalMemory)
     assert provider._initialized
 
 
-def test_get_memory_provider_dual_buffer():
+def test_get_memory_provider_dual_buffer(task_id):
     """Test dual buffer memory provider creation."""
     config = MemoryConfig(provider_type="dual_buffer")
-    provider = _get_memory_provider(config, "test_task_2")
+    provider = _get_memory_provider(config, task_id)
 
     assert isinstance(provider, DualBufferMemory)
 
 
-def test_get_pareto_tracker():
+def test_get_pareto_tracker(task_id):
     """Test Pareto tracker creation."""
     config = OptimizationConfig(objectives=["accuracy", "clarity"])
-    tracker = _get_pareto_tracker(config, "test_task_3")
+    tracker = _get_pareto_tracker(config, task_id)
 
     assert tracker.objectives == ["accuracy", "clarity"]
 
@@ -38,3 +38,11 @@ def test_entry_node_initializes_memory():
     assert result.get("memory_initialized") is True
     assert "memory_config" in result
     assert "optimization_config" in result
+
+
+def test_entry_node_archives_each_run_separately():
+    """Test repeated runs of the same task get distinct trajectory archives."""
+    first = entry_node(create_initial_state("Test task"))
+    second = entry_node(create_initial_state("Test task"))
+
+    assert first["trajectory_archive"] != second["trajectory_archive"]
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 
 from src.state import create_initial_state, MemoryConfig, OptimizationConfig
 from src.memory import HierarchicalMemory, DualBufferMemory
@@ -100,7 +100,6 @@ class TestParetoOptimizationIntegration:
         assert len(front) == 3
         assert c4 not in front
 
-    @patch("src.optimization.reflective_mutation.dspy")
     def test_reflective_mutation_creates_candidate(self, mock_dspy):
         mock_result = MagicMock()
         mock_result.analysis = "Prompt too vague"
@@ -135,11 +134,10 @@ class TestEndToEndIntegration:
         assert isinstance(state["memory_config"], MemoryConfig)
         assert isinstance(state["optimization_config"], OptimizationConfig)
 
-    def test_memory_tree_persists_across_iterations(self):
+    def test_memory_tree_persists_across_iterations(self, task_id):
         from src.graph import _get_memory_provider
 
         config = MemoryConfig(provider_type="hierarchical")
-        task_id = "persistent_test_unique"
 
         provider1 = _get_memory_provider(config, task_id)
         provider1.take_in_memory(
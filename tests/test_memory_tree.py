@@ -81,3 +81,91 @@ def test_thompson_sampling_selection():
 
     node_ids = [n.node_id for n in selections]
     assert len(set(node_ids)) > 1
+
+
+def test_select_nodes_thompson_batch():
+    """Test batched Thompson selection returns k draws from expandable nodes only."""
+    root_only = MemoryTree()
+    assert root_only.select_nodes_thompson(3) == [root_only.root] * 3
+
+    saturated = MemoryTree()
+    leaf = saturated.add_version("root", "Leaf", "Mature leaf")
+    for _ in range(5):
+        saturated.update_path_utilities(leaf.node_id, 9.5)
+    assert saturated.select_nodes_thompson(4) == [saturated.root] * 4
+
+    tree = MemoryTree()
+    exploited = tree.add_version("root", "Exploited", "Mature branch")
+    exploited_leaf = tree.add_version(exploited.node_id, "Exploited leaf", "Mature leaf")
+    open_a = tree.add_version("root", "Open A", "Promising branch")
+    open_b = tree.add_version("root", "Open B", "Another branch")
+    for _ in range(5):
+        tree.update_path_utilities(exploited_leaf.node_id, 9.5)
+
+    draws = tree.select_nodes_thompson(200)
+
+    assert len(draws) == 200
+    assert {n.node_id for n in draws} <= {open_a.node_id, open_b.node_id}
+
+
+def test_collect_candidates_skips_exploited_subtree():
+    """Test saturated branches are pruned from Thompson candidates."""
+    tree = MemoryTree()
+
+    exploited = tree.add_version("root", "Exploited", "Mature branch")
+    leaf = tree.add_version(exploited.node_id, "Exploited leaf", "Mature leaf")
+    open_branch = tree.add_version("root", "Open", "Promising branch")
+
+    for _ in range(5):
+        tree.update_path_utilities(leaf.node_id, 9.5)
+
+    candidates: list[MemoryNode] = []
+    tree._collect_candidates(tree.root, candidates)
+    candidate_ids = {n.node_id for n in candidates}
+
+    assert exploited.node_id not in candidate_ids
+    assert leaf.node_id not in candidate_ids
+    assert open_branch.node_id in candidate_ids
+
+
+def test_update_utility_reopens_pruned_subtree():
+    """Test a lowered utility on a node refreshes its ancestors' pruning stats."""
+    tree = MemoryTree()
+
+    branch = tree.add_version("root", "Branch", "Mature branch")
+    leaf = tree.add_version(branch.node_id, "Leaf", "Mature leaf")
+    for _ in range(5):
+        tree.update_path_utilities(leaf.node_id, 9.5)
+    assert leaf.node_id not in {n.node_id for n in tree.select_nodes_thompson(10)}
+
+    for _ in range(5):
+        leaf.update_utility(0.0)
+
+    assert branch.subtree_min_utility == leaf.mean_utility < 9.0
+    assert tree.root.subtree_min_utility == leaf.mean_utility
+
+    candidates: list[MemoryNode] = []
+    tree._collect_candidates(tree.root, candidates)
+    assert leaf.node_id in {n.node_id for n in candidates}
+
+
+def test_memory_tree_pareto_front():
+    """Test Pareto front trades off utility against visit count."""
+    tree = MemoryTree()
+
+    high = tree.add_version("root", "High", "High utility, well visited")
+    high.update_utility(9.0)
+    high.visit_count = 4
+
+    fresh = tree.add_version("root", "Fresh", "Lower utility, rarely visited")
+    fresh.update_utility(6.0)
+
+    dominated = tree.add_version("root", "Dominated", "Lower utility, heavily visited")
+    dominated.update_utility(5.0)
+    dominated.visit_count = 6
+
+    front_ids = {n.node_id for n in tree.get_pareto_front()}
+
+    assert high.node_id in front_ids
+    assert fresh.node_id in front_ids
+    assert dominated.node_id not in front_ids
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from src.optimization.pareto import ParetoState, Candidate, ParetoTracker
 
@@ -81,3 +83,45 @@ def test_pareto_state_serialization():
     assert "candidates" in state
     assert "pareto_front" in state
     assert "objectives" in state
+
+
+def test_pareto_state_serialize_round_trip():
+    """Test serialized tracker state decodes back to get_state()."""
+    tracker = ParetoTracker(objectives=["a", "b"])
+    tracker.add_candidate({"x": 1}, {"a": 7.0, "b": 8.0})
+    tracker.add_candidate({"x": 2}, {"a": 9.0, "b": 6.0})
+
+    assert json.loads(tracker.serialize_state()) == tracker.get_state()
+
+
+def test_prune_large_population_keeps_front():
+    """Test the packed dominance path recomputes the same front after pruning."""
+    tracker = ParetoTracker(objectives=["a", "b"])
+    for i in range(200):
+        tracker.add_candidate({"i": i}, {"a": float(i % 20), "b": float(19 - i % 20)})
+    tracker.add_candidate({"i": "best"}, {"a": 19.0, "b": 19.0})
+
+    tracker.prune_dominated(keep_n=150)
+
+    front = tracker.get_pareto_front()
+    assert [c.content["i"] for c in front] == ["best"]
+    assert len(tracker.candidates) == 151
+
+
+def test_get_state_snapshot_refreshes_after_changes():
+    """Test get_state reuses its snapshot until the tracker changes."""
+    tracker = ParetoTracker(objectives=["a", "b"])
+    tracker.add_candidate({"x": 1}, {"a": 7.0, "b": 8.0})
+
+    first = tracker.get_state()
+    assert tracker.get_state() is first
+
+    tracker.add_candidate({"x": 2}, {"a": 9.0, "b": 9.0})
+    second = tracker.get_state()
+    assert second["total_candidates"] == 2
+
+    tracker.advance_generation()
+    assert tracker.get_state()["generation"] == 1
+
+    tracker.prune_dominated(keep_n=0)
+    assert tracker.get_state()["total_candidates"] == 1
@@ -1,24 +1,16 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 from src.graph import reflection_node, _get_memory_provider
+from src.self_improvement import ReflectionMemoryStore
 from src.state import create_initial_state, MemoryConfig
 
 
-@patch("src.graph._get_memory_provider")
-@patch("src.graph.ReflectionAgent")
-def test_reflection_stores_trajectory(mock_reflector_class, mock_get_provider):
+def test_reflection_stores_trajectory(monkeypatch, mock_reflection_agent, mock_memory_provider):
     """Test reflection node stores learning in memory."""
-    mock_provider = MagicMock()
-    mock_provider.take_in_memory.return_value = (True, "Stored learning")
-    mock_get_provider.return_value = mock_provider
-
-    mock_reflector = MagicMock()
-    mock_memory = MagicMock()
-    mock_memory.iteration = 1
-    mock_memory.score = 7.5
-    mock_memory.improvement_suggestion = "Add more detail"
-    mock_reflector.return_value = mock_memory
-    mock_reflector_class.return_value = mock_reflector
+    monkeypatch.setattr("src.graph.ReflectionAgent", mock_reflection_agent)
+    monkeypatch.setattr("src.graph._get_memory_provider", lambda config, task_id: mock_memory_provider)
+    store = ReflectionMemoryStore()
+    monkeypatch.setattr("src.graph._get_reflection_store", lambda task_id: store)
 
     state = create_initial_state("Test task")
     state["current_draft"] = "Some content"
@@ -28,4 +20,29 @@ def test_reflection_stores_trajectory(mock_reflector_class, mock_get_provider):
     result = reflection_node(state)
 
     assert "reflection_memories" in result
-    mock_provider.take_in_memory.assert_called_once()
+    assert len(mock_memory_provider.stored) == 1
+    assert len(store.episodic) == 1
+
+
+def test_reflection_store_consolidates_episodes():
+    """Test episodic reflections are distilled into semantic memory every K entries."""
+    from src.state import ReflectionMemory
+
+    store = ReflectionMemoryStore(consolidate_every=2)
+    store.consolidator = MagicMock(return_value=MagicMock(semantic_insight="Cite sources"))
+
+    for i in range(1, 3):
+        store.add(
+            ReflectionMemory(
+                iteration=i,
+                action_taken="draft",
+                outcome="needs_improvement",
+                score=5.0,
+                reflection="Missing sources",
+                improvement_suggestion="Add citations",
+            )
+        )
+
+    assert store.semantic == "Cite sources"
+    assert len(store.episodic) == 0
+    store.consolidator.assert_called_once()
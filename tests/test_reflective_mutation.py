@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 from src.optimization.reflective_mutation import (
     ReflectiveMutator,
     FailureTrace,
@@ -34,15 +34,9 @@ def test_mutation_proposal_creation():
     assert "thorough" in proposal.proposed_content["prompt"]
 
 
-@patch("src.optimization.reflective_mutation.dspy")
-def test_reflective_mutator_analyze_failure(mock_dspy):
+def test_reflective_mutator_analyze_failure(monkeypatch, mock_dspy_chain):
     """Test failure analysis generates mutation proposal."""
-    mock_result = MagicMock()
-    mock_result.analysis = "Prompt lacks specificity about required sections"
-    mock_result.root_cause = "Missing structural guidance"
-    mock_result.improvement = "Add explicit section requirements"
-    mock_result.confidence = 0.8
-    mock_dspy.ChainOfThought.return_value.return_value = mock_result
+    monkeypatch.setattr("src.optimization.reflective_mutation.dspy", mock_dspy_chain)
 
     mutator = ReflectiveMutator()
 
@@ -61,13 +55,9 @@ def test_reflective_mutator_analyze_failure(mock_dspy):
     assert proposal.rationale != ""
 
 
-@patch("src.optimization.reflective_mutation.dspy")
-def test_reflective_mutator_merge_candidates(mock_dspy):
+def test_reflective_mutator_merge_candidates(monkeypatch, mock_dspy_chain):
     """Test merging high-performing candidates."""
-    mock_result = MagicMock()
-    mock_result.merged_content = "Combined best aspects: thorough and efficient"
-    mock_result.rationale = "Merged thoroughness from C1 with efficiency from C2"
-    mock_dspy.ChainOfThought.return_value.return_value = mock_result
+    monkeypatch.setattr("src.optimization.reflective_mutation.dspy", mock_dspy_chain)
 
     mutator = ReflectiveMutator()
 
@@ -78,3 +68,88 @@ def test_reflective_mutator_merge_candidates(mock_dspy):
 
     assert merged is not None
     assert "merged" in merged.mutation_description.lower() or merged.parent_id is not None
+
+
+def test_reflective_mutator_analyze_batch(mock_dspy):
+    """Test batched failure analysis returns one proposal per trace."""
+    mock_result = MagicMock()
+    mock_result.analysis = "Prompt lacks specificity"
+    mock_result.root_cause = "Missing structural guidance"
+    mock_result.improvement = "Add explicit section requirements"
+    mock_result.confidence = 0.8
+    mock_dspy.ChainOfThought.return_value.batch.return_value = [mock_result, None]
+
+    mutator = ReflectiveMutator()
+
+    traces = [
+        FailureTrace(
+            task=f"Task {i}",
+            candidate_content={"prompt": f"Prompt {i}"},
+            expected_outcome="Structured report",
+            actual_outcome="Unstructured text",
+            score=4.0,
+            objectives_failed=["structure"],
+        )
+        for i in range(2)
+    ]
+
+    proposals = mutator.analyze_and_propose_batch(traces)
+
+    assert len(proposals) == 2
+    assert "Add explicit section requirements" in proposals[0].proposed_content["prompt"]
+    assert proposals[1].confidence == 0.2
+    mock_dspy.ChainOfThought.return_value.batch.assert_called_once()
+
+
+def test_reflective_mutator_reuses_cached_analysis(mock_dspy):
+    """Test repeated failure traces do not re-run the analyzer."""
+    mock_result = MagicMock()
+    mock_result.analysis = "Prompt lacks specificity"
+    mock_result.root_cause = "Missing structural guidance"
+    mock_result.improvement = "Add explicit section requirements"
+    mock_result.confidence = 0.8
+    analyzer = mock_dspy.ChainOfThought.return_value
+    analyzer.return_value = mock_result
+
+    mutator = ReflectiveMutator()
+
+    def make_trace():
+        return FailureTrace(
+            task="Generate report",
+            candidate_content={"prompt": "Write a report"},
+            expected_outcome="Structured report",
+            actual_outcome="Unstructured text",
+            score=4.0,
+            objectives_failed=["structure"],
+        )
+
+    first = mutator.analyze_and_propose(make_trace())
+    second = mutator.analyze_and_propose(make_trace())
+
+    assert analyzer.call_count == 1
+    assert first.proposed_content == second.proposed_content
+    assert first.proposed_content is not second.proposed_content
+
+
+def test_reflective_mutator_reuses_cached_merge(mock_dspy):
+    """Test merging the same candidates again does not re-run the merger."""
+    mock_result = MagicMock()
+    mock_result.merged_content = "Combined best aspects"
+    mock_result.rationale = "Merged thoroughness with efficiency"
+    merger = mock_dspy.ChainOfThought.return_value
+    merger.return_value = mock_result
+
+    mutator = ReflectiveMutator()
+
+    c1 = Candidate("c1", {"prompt": "Be thorough"}, {"accuracy": 9.0, "efficiency": 6.0})
+    c2 = Candidate("c2", {"prompt": "Be efficient"}, {"accuracy": 6.0, "efficiency": 9.0})
+
+    first = mutator.merge_candidates([c1, c2])
+    # Same content under new ids, in a different order.
+    c3 = Candidate("c3", {"prompt": "Be efficient"}, {"accuracy": 6.0, "efficiency": 9.0})
+    c4 = Candidate("c4", {"prompt": "Be thorough"}, {"accuracy": 9.0, "efficiency": 6.0})
+    second = mutator.merge_candidates([c3, c4])
+
+    assert first.content == second.content
+    assert first.candidate_id != second.candidate_id
+    merger.assert_called_once()
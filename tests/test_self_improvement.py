@@ -0,0 +1,209 @@
+import asyncio
+from collections import deque
+
+import dspy
+from dspy.streaming import StreamResponse
+from dspy.utils.dummies import DummyLM
+
+from src.self_improvement import (
+    ConsensusVoter,
+    ConstitutionalCritic,
+    MetaLearner,
+    ReflectionAgent,
+    SelfRefiner,
+)
+from src.state import ConsensusVote, MetaLearningState, ReflectionMemory
+
+
+def _fake_streamify(program, stream_listeners):
+    async def run(**inputs):
+        for text in ("Refined ", "draft"):
+            yield StreamResponse("refiner", "refined_content", text, False)
+        yield program(**inputs)
+
+    return run
+
+
+def test_refiner_astream_scopes_lm_to_the_program(monkeypatch):
+    """Test the routed LM applies inside the streamed program but never leaks to the consumer."""
+    monkeypatch.setattr(dspy, "streamify", _fake_streamify)
+    routed = dspy.LM("openai/gpt-4o-mini")
+    seen = []
+
+    def fake_refiner(**inputs):
+        seen.append(dspy.settings.lm)
+        return dspy.Prediction(refined_content="Refined draft", changes_made="", remaining_issues="")
+
+    refiner = SelfRefiner(lm=routed)
+    refiner.refiner = fake_refiner
+
+    async def consume():
+        outside = []
+        chunks = []
+        async for chunk in refiner.astream("Task", "Draft", "Critique", "Insights"):
+            outside.append(dspy.settings.lm)
+            chunks.append(chunk)
+        return chunks, outside
+
+    chunks, outside = asyncio.run(consume())
+
+    assert chunks[:2] == ["Refined ", "draft"]
+    assert chunks[-1]["refined_content"] == "Refined draft"
+    assert seen == [routed]
+    assert routed not in outside
+
+
+def test_refiner_astream_closes_early_from_another_context(monkeypatch):
+    """Test closing the stream after the first chunk, from a different task, does not raise."""
+    monkeypatch.setattr(dspy, "streamify", _fake_streamify)
+    refiner = SelfRefiner(lm=dspy.LM("openai/gpt-4o-mini"))
+
+    async def consume():
+        stream = refiner.astream("Task", "Draft", "Critique", "Insights")
+        first = await stream.__anext__()
+        # A separate task runs with a copied context, like a framework cancelling the stream.
+        await asyncio.create_task(stream.aclose())
+        return first
+
+    assert asyncio.run(consume()) == "Refined "
+
+
+def _fake_voter(plan, cancelled):
+    """ConsensusVoter whose roles vote from plan: role -> (delay, score, confidence) or an exception."""
+    voter = ConsensusVoter()
+
+    async def avote(content, task, voter_role):
+        outcome = plan[voter_role]
+        if isinstance(outcome, Exception):
+            raise outcome
+        delay, score, confidence = outcome
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(voter_role)
+            raise
+        return ConsensusVote(voter=voter_role, score=score, rationale="", confidence=confidence)
+
+    voter._avote = avote
+    return voter
+
+
+def test_stream_votes_accepts_and_cancels_pending_voters():
+    """Test two confident agreeing votes cross the upper bound and cancel the slow voter."""
+    cancelled = []
+    voter = _fake_voter({"a": (0.01, 9.0, 1.0), "b": (0.02, 8.0, 1.0), "c": (5, 2.0, 1.0)}, cancelled)
+
+    votes = asyncio.run(voter.stream_votes("Draft", "Task", ["a", "b", "c"]))
+
+    assert [v.voter for v in votes] == ["a", "b"]
+    assert cancelled == ["c"]
+
+
+def test_stream_votes_rejects_on_disagreement():
+    """Test two confident disagreeing votes cross the lower bound."""
+    cancelled = []
+    voter = _fake_voter({"a": (0.01, 3.0, 1.0), "b": (0.02, 4.0, 1.0), "c": (5, 9.0, 1.0)}, cancelled)
+
+    votes = asyncio.run(voter.stream_votes("Draft", "Task", ["a", "b", "c"]))
+
+    assert [v.score for v in votes] == [3.0, 4.0]
+    assert cancelled == ["c"]
+
+
+def test_stream_votes_weights_by_confidence():
+    """Test low-confidence votes move the ratio less, so more votes are collected."""
+    cancelled = []
+    plan = {role: (0.01 * (i + 1), 9.0, 0.5) for i, role in enumerate("abcd")}
+    voter = _fake_voter(plan, cancelled)
+
+    votes = asyncio.run(voter.stream_votes("Draft", "Task", list("abcd")))
+
+    assert [v.voter for v in votes] == ["a", "b", "c"]
+    assert cancelled == ["d"]
+
+
+def test_stream_votes_logs_and_skips_failed_voters(capsys):
+    """Test a failing voter is reported by role and does not stop the vote."""
+    voter = _fake_voter({"a": RuntimeError("rate limited"), "b": (0.01, 9.0, 1.0)}, [])
+
+    votes = asyncio.run(voter.stream_votes("Draft", "Task", ["a", "b"]))
+
+    assert [v.voter for v in votes] == ["b"]
+    assert "Consensus voter error (a): rate limited" in capsys.readouterr().out
+
+
+def test_critic_normalizes_severity_casing_and_unknown_labels(monkeypatch):
+    """Test capitalized severities parse and unrecognized ones fall back to minor."""
+    monkeypatch.setattr("src.self_improvement.get_cached", lambda key: None)
+    monkeypatch.setattr("src.self_improvement.set_cached", lambda key, value: None)
+    replies = [
+        {
+            "reasoning": "Checked each principle",
+            "violated_principle": "none",
+            "severity": severity,
+            "critique": "Unsourced claim",
+            "revision_request": "Cite a source",
+            "is_acceptable": "False",
+        }
+        for severity in ("MAJOR", "Moderate")
+    ]
+    critic = ConstitutionalCritic(lm=DummyLM(replies))
+
+    assert critic(content="Draft one").severity == "major"
+    assert critic(content="Draft two").severity == "minor"
+
+
+def test_meta_learner_clamps_out_of_range_weights():
+    """Test proposed strategy weights outside [0, 1] are clamped rather than rejected."""
+    reply = {
+        "reasoning": "Scores are climbing",
+        "strategy_adjustment": "Go deeper",
+        "new_weights": '{"depth_vs_breadth": 1.2, "creativity_vs_precision": -0.1, '
+        '"exploration_vs_exploitation": 0.4}',
+    }
+    learner = MetaLearner(lm=DummyLM([reply]))
+
+    state = learner(
+        scores=[5.0, 6.0, 7.0],
+        successful_patterns=[],
+        failed_patterns=[],
+        current_state=MetaLearningState(),
+    )
+
+    assert state.strategy_weights == {
+        "depth_vs_breadth": 1.0,
+        "creativity_vs_precision": 0.0,
+        "exploration_vs_exploitation": 0.4,
+    }
+
+
+def test_reflection_summarizes_last_three_from_list_or_deque(monkeypatch):
+    """Test lists and deques of past reflections yield the same recent summary."""
+    monkeypatch.setattr("src.self_improvement.get_cached", lambda key: None)
+    monkeypatch.setattr("src.self_improvement.set_cached", lambda key, value: None)
+    past = [
+        ReflectionMemory(
+            iteration=i,
+            action_taken="Draft",
+            outcome="needs_improvement",
+            score=float(i),
+            reflection=f"Lesson {i}",
+            improvement_suggestion="Try again",
+        )
+        for i in range(1, 6)
+    ]
+    summaries = []
+
+    def fake_reflector(**inputs):
+        summaries.append(inputs["past_reflections"])
+        return dspy.Prediction(reflection="Noted", improvement_strategy="Keep going")
+
+    agent = ReflectionAgent()
+    agent.reflector = fake_reflector
+
+    for history in (past, deque(past, maxlen=8)):
+        assert agent("Task", "Output", 6.0, "Feedback", history).iteration == 6
+
+    assert summaries[0] == summaries[1]
+    assert "Lesson 2" not in summaries[0]
+    assert all(f"Lesson {i}" in summaries[0] for i in (3, 4, 5))
@@ -1,14 +1,13 @@
 import pytest
-from unittest.mock import patch, MagicMock
 from src.graph import specialist_agent_node, _get_memory_provider
 from src.state import MemoryConfig
 from src.memory.base import MemoryStatus, TrajectoryData
 
 
-def test_specialist_requests_memory_guidance():
+def test_specialist_requests_memory_guidance(monkeypatch, task_id):
     """Test specialist agent incorporates memory guidance into its context."""
     config = MemoryConfig(provider_type="dual_buffer")
-    provider = _get_memory_provider(config, "test_specialist_task")
+    provider = _get_memory_provider(config, task_id)
 
     provider.take_in_memory(
         TrajectoryData(
@@ -29,20 +28,19 @@ def test_specialist_requests_memory_guidance():
         "context_summary": "",
         "meta_guidance": "",
         "memory_config": config,
-        "memory_task_id": "test_specialist_task",
+        "memory_task_id": task_id,
     }
 
-    with patch("src.graph.get_agent") as mock_get_agent:
-        mock_agent = MagicMock()
-        mock_agent.return_value = {
-            "agent_name": "Analysis",
-            "content": "Analysis result",
-            "confidence": 0.8,
-        }
-        mock_get_agent.return_value = mock_agent
+    calls = []
 
-        result = specialist_agent_node(state)
+    def agent(**inputs):
+        calls.append(inputs)
+        return {"agent_name": "Analysis", "content": "Analysis result", "confidence": 0.8}
 
-        assert result is not None
-        assert "agent_outputs" in result
-        mock_agent.assert_called_once()
+    monkeypatch.setattr("src.graph.get_agent", lambda agent_type: agent)
+
+    result = specialist_agent_node(state)
+
+    assert result is not None
+    assert "agent_outputs" in result
+    assert len(calls) == 1
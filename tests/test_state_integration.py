@@ -4,6 +4,7 @@ import pytest
 from src.state import (
     AgentState,
     create_initial_state,
+    keep_last,
     MemoryConfig,
     OptimizationConfig,
 )
@@ -45,3 +46,40 @@ def test_state_initializes_with_configs():
 
     opt_config = state["optimization_config"]
     assert len(opt_config.objectives) > 0
+
+
+def test_keep_last_reducer_bounds_history():
+    """Test bounded reducer appends updates but keeps only the newest entries."""
+    reducer = keep_last(3)
+
+    assert reducer([1.0, 2.0], [3.0]) == [1.0, 2.0, 3.0]
+    assert reducer([1.0, 2.0, 3.0], [4.0, 5.0]) == [3.0, 4.0, 5.0]
+
+
+def test_principles_resolve_to_shared_entries_only():
+    """Test a named principle maps to the shared constant while free text is kept as given."""
+    from src.state import CONSTITUTIONAL_PRINCIPLES, CritiqueResult
+
+    principle = CONSTITUTIONAL_PRINCIPLES[0]
+    matched = CritiqueResult(
+        principle_violated=f"1. {principle.lower()}", critique="", revision_request=""
+    )
+    unmatched = CritiqueResult(
+        principle_violated="Tone is too informal", critique="", revision_request=""
+    )
+
+    assert matched.principle_violated is principle
+    assert unmatched.principle_violated == "Tone is too informal"
+
+
+def test_shared_names_table_is_bounded(monkeypatch):
+    """Test unbounded distinct voter names do not grow the shared-name table past its cap."""
+    from src.state import _SHARED_NAMES_MAX, ConsensusVote
+
+    shared: dict[str, str] = {}
+    monkeypatch.setattr("src.state._SHARED_NAMES", shared)
+
+    for i in range(_SHARED_NAMES_MAX + 50):
+        ConsensusVote(voter=f"Reviewer {i}", score=5.0, rationale="")
+
+    assert len(shared) == _SHARED_NAMES_MAX
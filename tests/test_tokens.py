@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import src.tokens
+from src.tokens import clip
+
+
+def _byte_encoding():
+    """Worst-case byte-level tokenizer: one token per UTF-8 byte."""
+    return SimpleNamespace(
+        encode=lambda text, disallowed_special=(): list(text.encode()),
+        decode=lambda ids: bytes(ids).decode(errors="ignore"),
+    )
+
+
+def test_clip_ascii(monkeypatch):
+    """Test ASCII text under budget is returned as-is and longer text is cut to the budget."""
+    monkeypatch.setattr(src.tokens, "_encoding", _byte_encoding)
+
+    assert clip("short", 10) == "short"
+    assert clip("a" * 50, 10) == "a" * 10
+
+
+def test_clip_cjk_costs_more_than_one_token_per_char(monkeypatch):
+    """Test multi-byte text within the character count but over the token budget is clipped."""
+    monkeypatch.setattr(src.tokens, "_encoding", _byte_encoding)
+    text = "模型推理需要记忆"  # 8 characters, 24 bytes
+
+    assert clip(text, 12) == text[:4]
+    assert clip(text, 24) == text
+
+
+def test_clip_offline_fallback_matches_character_limits(monkeypatch):
+    """Test the fallback keeps the old character limits when no tokenizer can be loaded."""
+    monkeypatch.setattr(src.tokens, "_encoding", lambda: None)
+
+    assert len(clip("x" * 10_000, 900)) == 3000
+    assert len(clip("x" * 10_000, 1200)) == 4000
+    assert len(clip("x" * 10_000, 450)) == 1500